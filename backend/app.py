@@ -1,18 +1,56 @@
-from flask import Flask, request, jsonify
+import json
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required
 
+# --- parche de path para poder importar "backend" como paquete ---
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# -----------------------------------------------------------------
+
+from backend import database, security
+from backend.core.cache import cached_simulate, cached_simulate_debt, cached_simulate_mc
+from backend.core import montecarlo
+from backend.core.calc import DebtError
+from backend.core.packing import ARROW_MIME, PACKED_MIME, PackedWriter, arrow_available
+from backend.core.payloads import (
+    MAX_SCENARIOS,
+    PayloadError,
+    check_mc_work,
+    check_result,
+    debt_from_dict,
+    debt_to_dict,
+    inputs_from_dict,
+    mc_to_dict,
+    option,
+    parse_each,
+    result_to_dict,
+    scenarios_from_body,
+)
+
+# Límites de Monte Carlo por petición (es lo más caro de la API)
+MC_MAX_SCENARIOS = 20
+MC_MAX_RUNS = 100_000
+
 # Inicialización de la app
 app = Flask(__name__)
 
 # Configuración
 app.config['SECRET_KEY'] = 'super-secret-key'  # cámbiala en producción
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///data.db'
+# Base de datos: DATABASE_URL (SQLite por defecto, o PostgreSQL) y pool; ver backend/database.py
+app.config['SQLALCHEMY_DATABASE_URI'] = database.database_url()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = database.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# Inicialización de DB y JWT
+# Inicialización de DB, JWT y bcrypt (costo: variable de entorno BCRYPT_LOG_ROUNDS)
 db = SQLAlchemy(app)
 jwt = JWTManager(app)
+security.init_app(app)
 
 # --------------------
 # MODELO DE USUARIO
@@ -22,8 +60,9 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(120), nullable=False)
 
-# Crear tablas (si no existen)
+# Pragmas de SQLite (WAL, synchronous, busy_timeout) y tablas (si no existen)
 with app.app_context():
+    database.configure_engine(db.engine)
     db.create_all()
 
 # --------------------
@@ -37,14 +76,18 @@ def home():
 # Registro de usuario
 @app.route("/auth/register", methods=["POST"])
 def register():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "El cuerpo debe ser un objeto JSON"}), 400
     email = data.get("email")
     password = data.get("password")
+    if not isinstance(email, str) or not isinstance(password, str) or not email or not password:
+        return jsonify({"error": "Faltan email o password"}), 400
 
     if User.query.filter_by(email=email).first():
         return jsonify({"error": "El usuario ya existe"}), 400
 
-    new_user = User(email=email, password=password)
+    new_user = User(email=email, password=security.hash_password(password))
     db.session.add(new_user)
     db.session.commit()
 
@@ -53,13 +96,23 @@ def register():
 # Login de usuario
 @app.route("/auth/login", methods=["POST"])
 def login():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "El cuerpo debe ser un objeto JSON"}), 400
     email = data.get("email")
     password = data.get("password")
 
-    user = User.query.filter_by(email=email, password=password).first()
-    if not user:
+    if not isinstance(email, str) or not isinstance(password, str):
+        return jsonify({"error": "Credenciales inválidas"}), 401
+
+    user = User.query.filter_by(email=email).first()
+    valid, needs_rehash = security.verify_password(user.password if user else None, password)
+    if not valid:
         return jsonify({"error": "Credenciales inválidas"}), 401
+    if needs_rehash:
+        # Texto plano heredado o costo anterior: se guarda con el hash actual
+        user.password = security.hash_password(password)
+        db.session.commit()
 
     access_token = create_access_token(identity=email)
     return jsonify({"token": access_token}), 200
@@ -71,6 +124,141 @@ def protected():
     return jsonify({"message": "Accediste a una ruta protegida 🔒"})
 
 
+# --------------------
+# SIMULACIÓN
+# --------------------
+# Cada endpoint recibe un lote de escenarios (lista o {"scenarios": [...]})
+# y responde en el mismo orden, en un solo viaje. El formato se negocia con
+# el encabezado Accept:
+# - application/json (por defecto): {"results": [...]}. Un escenario inválido,
+#   que desborda al motor o que da valores no finitos responde 400 con
+#   {"error": ..., "index": i} (igual en los formatos binarios).
+# - application/x-ndjson: una línea {"index": i, ...} por escenario,
+#   transmitida conforme se calcula; la memoria del servidor no crece con el
+#   lote. Un escenario inválido o que hace fallar al motor produce su propia
+#   línea {"index": i, "error": ...} y el lote continúa.
+# - application/vnd.calculadora.f64: float64 little-endian por columnas
+#   (ver backend/core/packing.py), sin costo de codificar JSON.
+# - application/vnd.apache.arrow.stream: Arrow IPC, si pyarrow está instalado.
+
+NDJSON = "application/x-ndjson"
+STREAM_MAX_SCENARIOS = 100_000
+BINARY_MAX_SCENARIOS = 10_000
+
+@app.errorhandler(PayloadError)
+def payload_error(exc):
+    return jsonify(exc.to_dict()), 400
+
+def _response_format():
+    if not request.accept_mimetypes:  # sin encabezado Accept
+        return "application/json"
+    offered = ["application/json", NDJSON, PACKED_MIME] + ([ARROW_MIME] if arrow_available() else [])
+    return request.accept_mimetypes.best_match(offered)
+
+def _batch(fmt, limit=MAX_SCENARIOS):
+    if fmt == NDJSON:
+        limit = max(limit, STREAM_MAX_SCENARIOS)
+    elif fmt in (PACKED_MIME, ARROW_MIME):
+        limit = max(limit, BINARY_MAX_SCENARIOS)
+    return scenarios_from_body(request.get_json(silent=True), limit)
+
+def _compute(compute, item, index):
+    """``compute(item)``; engine errors (desborde, dominio) y resultados no
+    finitos salen como PayloadError del escenario ``index`` (400)."""
+    try:
+        return check_result(compute(item))
+    except PayloadError as exc:
+        raise PayloadError(str(exc), index) from None
+    except (ArithmeticError, ValueError) as exc:
+        raise PayloadError(f"No se pudo simular el escenario: {exc}", index) from None
+
+def _respond(kind, scenarios, parse, compute, to_dict, fmt):
+    """``compute(parse(item))`` for every scenario, encoded as ``fmt``."""
+    if fmt == NDJSON:
+        def lines():
+            for index, item in enumerate(scenarios):
+                try:
+                    out = {"index": index, **to_dict(_compute(compute, parse(item), index))}
+                except PayloadError as exc:
+                    out = {"index": index, "error": str(exc)}
+                except Exception as exc:
+                    # La respuesta 200 ya empezó: un fallo del motor se reporta en su línea
+                    # en lugar de cortar el stream.
+                    app.logger.exception("Fallo al simular el escenario %d", index)
+                    out = {"index": index, "error": f"Error al simular el escenario: {type(exc).__name__}"}
+                yield json.dumps(out, separators=(",", ":")) + "\n"
+
+        return Response(stream_with_context(lines()), mimetype=NDJSON)
+    plans = parse_each(scenarios, parse)
+    if fmt in (PACKED_MIME, ARROW_MIME):
+        writer = PackedWriter(kind)
+        for index, item in enumerate(plans):
+            writer.add(_compute(compute, item, index))
+        body = writer.to_bytes() if fmt == PACKED_MIME else writer.to_arrow()
+        return Response(body, mimetype=fmt)
+    return jsonify({"results": [to_dict(_compute(compute, item, index)) for index, item in enumerate(plans)]})
+
+def _debt_to_json(result):
+    if isinstance(result, DebtError):
+        return {"error": result.key, "message": str(result)}
+    return debt_to_dict(*result)
+
+# Inversión: opciones "rows" (tabla anual, true por defecto)
+@app.route("/simulate/investment", methods=["POST"])
+def simulate_investment():
+    fmt = _response_format()
+    if fmt is None:
+        return jsonify({"error": "Formato de respuesta no disponible."}), 406
+    scenarios, options = _batch(fmt)
+    rows = option(options, "rows", "bool", True)
+    compute = lambda p: cached_simulate(p, rows=rows)
+    return _respond("investment", scenarios, inputs_from_dict, compute, result_to_dict, fmt)
+
+# Créditos: un crédito que no se liquida no tumba el lote, trae su propio error
+@app.route("/simulate/debt", methods=["POST"])
+def simulate_debt():
+    fmt = _response_format()
+    if fmt is None:
+        return jsonify({"error": "Formato de respuesta no disponible."}), 406
+    scenarios, options = _batch(fmt)
+    rows = option(options, "rows", "bool", True)
+
+    def compute(data):
+        try:
+            return cached_simulate_debt(data, rows=rows)
+        except DebtError as exc:
+            return exc
+
+    return _respond("debt", scenarios, debt_from_dict, compute, _debt_to_json, fmt)
+
+# Monte Carlo: opciones "runs" (por defecto mc_runs de cada escenario), "seed", "frictions"
+@app.route("/simulate/montecarlo", methods=["POST"])
+def simulate_montecarlo():
+    if montecarlo.np is None:
+        return jsonify({"error": "numpy es necesario para Monte Carlo (pip install numpy)."}), 503
+    fmt = _response_format()
+    if fmt is None:
+        return jsonify({"error": "Formato de respuesta no disponible."}), 406
+    scenarios, options = scenarios_from_body(request.get_json(silent=True), MC_MAX_SCENARIOS)
+    runs = option(options, "runs", "int", None)
+    seed = option(options, "seed", "int", None)
+    frictions = option(options, "frictions", "bool", True)
+    if seed is not None and seed < 0:
+        raise PayloadError("'seed' debe ser un entero no negativo.")
+
+    def runs_for(p):
+        return max(montecarlo.MIN_RUNS, min(MC_MAX_RUNS, runs if runs is not None else p.mc_runs))
+
+    def parse(item):
+        p = inputs_from_dict(item)
+        check_mc_work(p, runs_for(p))
+        return p
+
+    def compute(p):
+        return cached_simulate_mc(p, runs=runs_for(p), seed=seed, frictions=frictions)
+
+    return _respond("montecarlo", scenarios, parse, compute, mc_to_dict, fmt)
+
 # --------------------
 # MAIN
 # --------------------
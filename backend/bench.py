@@ -0,0 +1,195 @@
+"""
+bench.py
+--------
+Mediciones rápidas de rendimiento del backend (no forman parte de la app).
+
+Uso::
+
+    python -m backend.bench engines [--years 40] [--term 360] [--repeat 200]
+    python -m backend.bench login [--rounds 10 12] [--logins 64] [--clients 8]
+    python -m backend.bench db [--journal delete wal] [--users 200] [--clients 16] [--rounds 4]
+
+``engines`` compara, para el motor de inversión y el de créditos, la corrida
+completa (con tabla) contra el modo solo-resumen (``rows=False``): tiempo por
+llamada con ``timeit`` y memoria asignada con ``tracemalloc``. El modo
+solo-resumen ahorra memoria y tiempo en todos los motores; en el de inversión
+por pasos el ahorro de tiempo es menor que el que sugiere una sola corrida,
+porque el primer caso de cada bloque paga el calentamiento.
+
+``login`` mide, por costo de bcrypt, el tiempo de un hash y los logins por
+segundo verificando en serie y con varios clientes concurrentes contra el pool
+de :mod:`backend.security` (no toca la base de datos).
+
+``db`` es una prueba de carga de la API: registros, logins y una mezcla de
+ambos desde varios clientes concurrentes contra una base SQLite temporal, una
+vez por modo de journal. El costo de bcrypt se baja (``--rounds``) para que
+domine la base de datos y no el hash.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence, Tuple
+
+from backend.core.calc import DebtInputs, simulate_debt
+from backend.core.invest_calc import Inputs, simulate
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> Tuple[float, int, int]:
+    """Best time per call (s), peak and retained bytes of one call."""
+    best = min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak, retained
+
+
+def _report(title: str, cases: List[Tuple[str, Callable[[], object]]], repeat: int) -> None:
+    print(title)
+    base = None
+    for label, fn in cases:
+        t, peak, retained = _measure(fn, repeat)
+        base = base or t
+        print(f"  {label:<28} {t * 1e6:10.1f} us  x{base / t:5.1f}  peak {peak / 1024:8.1f} KiB  kept {retained / 1024:8.1f} KiB")
+
+
+def bench_engines(years: int = 40, term: int = 360, repeat: int = 200) -> None:
+    # Calendario irregular: obliga al motor por pasos
+    plan = Inputs(initial=10_000, monthly=2_500, years=years, frequency="biweekly",
+                  mgmt=1.0, custody_fixed=15.0, div_yield=2.0, extra_months="12", extra_amount=5_000)
+    regular = Inputs(initial=10_000, monthly=2_500, years=years, mgmt=1.0)
+    _report(f"Inversión ({years} años)", [
+        ("pasos, con tabla", lambda: simulate(plan)),
+        ("pasos, solo resumen", lambda: simulate(plan, rows=False)),
+        ("forma cerrada, con tabla", lambda: simulate(regular)),
+        ("forma cerrada, solo resumen", lambda: simulate(regular, rows=False)),
+    ], repeat)
+
+    debt = DebtInputs(title="bench", cost=2_500_000, down_payment=250_000, cat_annual=12.5,
+                      open_pct=1.0, insurance_monthly=450.0, term_months=term)
+    irregular = DebtInputs(title="bench", cost=2_500_000, down_payment=250_000, cat_annual=12.5,
+                           open_pct=1.0, insurance_monthly=450.0, term_months=term,
+                           extra_months={6, 12}, extra_amount=20_000)
+    _report(f"Crédito ({term} meses)", [
+        ("ciclo, con tabla", lambda: simulate_debt(irregular)),
+        ("ciclo, solo resumen", lambda: simulate_debt(irregular, rows=False)),
+        ("forma cerrada, con tabla", lambda: simulate_debt(debt)),
+        ("forma cerrada, solo resumen", lambda: simulate_debt(debt, rows=False)),
+    ], repeat)
+
+
+def bench_login(rounds: Sequence[int] = (10, 12), logins: int = 64, clients: int = 8) -> None:
+    from flask import Flask
+
+    from backend import security
+
+    print(f"Login ({logins} verificaciones, {clients} clientes, pool de {security.WORKERS} hilos)")
+    for cost in rounds:
+        app = Flask("bench")
+        app.config["BCRYPT_LOG_ROUNDS"] = cost
+        security.init_app(app)
+        start = time.perf_counter()
+        with app.app_context():
+            stored = security.hash_password("correct horse battery staple")
+        hash_s = time.perf_counter() - start
+
+        def login(_i: int) -> bool:
+            with app.app_context():
+                return security.verify_password(stored, "correct horse battery staple")[0]
+
+        start = time.perf_counter()
+        for i in range(logins):
+            login(i)
+        serial = logins / (time.perf_counter() - start)
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            start = time.perf_counter()
+            assert all(pool.map(login, range(logins)))
+            concurrent = logins / (time.perf_counter() - start)
+        print(f"  costo {cost:2d}   hash {hash_s * 1e3:8.1f} ms   serie {serial:8.1f} login/s   concurrente {concurrent:8.1f} login/s")
+    start = time.perf_counter()
+    for _ in range(logins):
+        security.verify_password("texto-plano-heredado", "texto-plano-heredado")
+    print(f"  texto plano heredado (antes del rehash) {logins / (time.perf_counter() - start):10.0f} login/s")
+
+
+def bench_db(journals: Sequence[str] = ("delete", "wal"), users: int = 200, clients: int = 16, rounds: int = 4) -> None:
+    print(f"Base de datos ({users} usuarios, {clients} clientes, bcrypt costo {rounds})")
+    saved = dict(os.environ)
+    try:
+        for journal in journals:
+            with tempfile.TemporaryDirectory() as tmp:
+                os.environ.update(
+                    DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+                    SQLITE_JOURNAL_MODE=journal,
+                    BCRYPT_LOG_ROUNDS=str(rounds),
+                )
+                # La app lee su configuración al importarse: una instancia nueva por modo.
+                sys.modules.pop("backend.app", None)
+                api = importlib.import_module("backend.app")
+
+                def post(call: Tuple[str, dict]) -> int:
+                    path, body = call
+                    return api.app.test_client().post(path, json=body).status_code
+
+                def phase(label: str, calls: List[Tuple[str, dict]]) -> None:
+                    with ThreadPoolExecutor(max_workers=clients) as pool:
+                        start = time.perf_counter()
+                        codes = list(pool.map(post, calls))
+                        elapsed = time.perf_counter() - start
+                    failed = sum(1 for code in codes if code >= 300)
+                    print(f"  {journal:<8} {label:<10} {len(calls) / elapsed:8.1f} req/s   fallidas {failed}")
+
+                def user(i: int) -> dict:
+                    return {"email": f"user{i}@bench", "password": f"pw-{i}"}
+
+                phase("registro", [("/auth/register", user(i)) for i in range(users)])
+                phase("login", [("/auth/login", user(i)) for i in range(users)])
+                phase("mixto", [
+                    ("/auth/register", user(users + i)) if i % 2 else ("/auth/login", user(i))
+                    for i in range(users)
+                ])
+                with api.app.app_context():
+                    api.db.engine.dispose()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        sys.modules.pop("backend.app", None)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.bench", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    eng = sub.add_parser("engines", help="con tabla vs solo resumen")
+    eng.add_argument("--years", type=int, default=40)
+    eng.add_argument("--term", type=int, default=360)
+    eng.add_argument("--repeat", type=int, default=200)
+    log = sub.add_parser("login", help="throughput de bcrypt por costo")
+    log.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    log.add_argument("--logins", type=int, default=64)
+    log.add_argument("--clients", type=int, default=8)
+    dbp = sub.add_parser("db", help="carga concurrente de registro/login")
+    dbp.add_argument("--journal", nargs="+", default=["delete", "wal"])
+    dbp.add_argument("--users", type=int, default=200)
+    dbp.add_argument("--clients", type=int, default=16)
+    dbp.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args(argv)
+    if args.command == "engines":
+        bench_engines(args.years, args.term, args.repeat)
+    elif args.command == "login":
+        bench_login(args.rounds, args.logins, args.clients)
+    elif args.command == "db":
+        bench_db(args.journal, args.users, args.clients, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
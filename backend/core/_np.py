@@ -0,0 +1,27 @@
+"""
+_np.py
+------
+NumPy opcional para los motores del backend.
+
+Los motores escalares (``invest_calc`` y el ciclo de ``calc``) corren sin
+NumPy; los batch, Monte Carlo, los estimadores de cuantiles y la decodificación
+sin copia de ``packing`` lo usan. Todos importan ``np`` de aquí y las rutas que
+no pueden seguir sin él llaman a :func:`require_numpy` al entrar.
+"""
+
+from __future__ import annotations
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - sin numpy solo corren los motores escalares
+    np = None  # type: ignore
+
+
+def require_numpy(purpose: str) -> None:
+    """Raise ``RuntimeError`` when numpy is missing; ``purpose`` completes
+    "numpy es necesario para ..."."""
+    if np is None:
+        raise RuntimeError(f"numpy es necesario para {purpose} (pip install numpy).")
+
+
+__all__ = ["np", "require_numpy"]
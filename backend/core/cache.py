@@ -0,0 +1,184 @@
+"""
+cache.py
+--------
+Caché LRU acotada frente a los motores de inversión, créditos y Monte Carlo.
+
+La interfaz vuelve una y otra vez a las mismas posiciones de los sliders, y
+al cambiar de idioma recalcula con insumos idénticos. Las llaves son una
+forma congelada (hashable) de ``Inputs``/``DebtInputs``: tuplas de valores,
+con las listas de meses normalizadas a ``frozenset`` para que ``"6,12"`` y
+``"12, 6"`` compartan entrada.
+
+La proyección determinista no depende de ``vol_annual`` ni de ``mc_runs``:
+sus llaves los omiten, así que mover el slider de Monte Carlo no la recalcula.
+
+Además, :func:`cached_simulate` guarda una :class:`HorizonProjection` por
+plan sin contar el horizonte: mover solo el slider de años reanuda la
+proyección desde el último año calculado en lugar de empezar de cero.
+
+Los resultados se comparten entre llamadas: trátalos como de solo lectura.
+Las excepciones (créditos que no se liquidan, Monte Carlo cancelado) no se
+guardan.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import fields, replace
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from backend.core.calc import DebtInputs, simulate_debt
+from backend.core.invest_calc import HorizonProjection, Inputs, parse_months
+
+DEFAULT_MAXSIZE = 256
+
+_MONTH_TEXT_FIELDS = ("extra_months", "skip_months")
+# Campos que solo lee Monte Carlo
+MC_FIELDS = ("vol_annual", "mc_runs")
+
+
+def freeze_inputs(p: Inputs, exclude: Tuple[str, ...] = ()) -> Tuple:
+    """Hashable key for ``Inputs``; month lists become frozensets and the
+    fields in ``exclude`` are left out."""
+    return tuple(
+        frozenset(parse_months(getattr(p, f.name))) if f.name in _MONTH_TEXT_FIELDS else getattr(p, f.name)
+        for f in fields(p)
+        if f.name not in exclude
+    )
+
+
+def freeze_debt(data: DebtInputs) -> Tuple:
+    """Hashable key for ``DebtInputs`` (the title does not affect the result)."""
+    return tuple(
+        frozenset(getattr(data, f.name)) if f.name in _MONTH_TEXT_FIELDS else getattr(data, f.name)
+        for f in fields(data)
+        if f.name != "title"
+    )
+
+
+class SimulationCache:
+    """Thread-safe bounded LRU map ``key -> result`` with hit/miss counters."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        # Se calcula fuera del candado: dos hilos con la misma llave pueden
+        # calcular a la vez, pero ninguno bloquea a los demás.
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Cachés de proceso usadas por la interfaz
+invest_cache = SimulationCache()
+debt_cache = SimulationCache()
+mc_cache = SimulationCache(maxsize=32)
+projection_cache = SimulationCache(maxsize=32)
+
+
+def _projection_key(p: Inputs, closed_form: bool) -> Tuple:
+    return (freeze_inputs(replace(p, years=0), exclude=MC_FIELDS), closed_form)
+
+
+def projection_for(p: Inputs, closed_form: bool = True) -> HorizonProjection:
+    """Shared :class:`HorizonProjection` for every horizon of ``p``."""
+    key = _projection_key(p, closed_form)
+    return projection_cache.get_or_compute(key, lambda: HorizonProjection(p, closed_form=closed_form))
+
+
+def _project(p: Inputs, closed_form: bool, rows: bool):
+    try:
+        return projection_for(p, closed_form).result(int(p.years), rows=rows)
+    except Exception:
+        # Un plan que hace fallar al motor no se queda en la caché.
+        projection_cache.discard(_projection_key(p, closed_form))
+        raise
+
+
+def cached_simulate(p: Inputs, closed_form: bool = True, rows: bool = True):
+    """:func:`backend.core.invest_calc.simulate` through :data:`invest_cache`,
+    resuming from the plan's :func:`projection_for` on a miss."""
+    key = (freeze_inputs(p, exclude=MC_FIELDS), closed_form, rows)
+    return invest_cache.get_or_compute(key, lambda: _project(p, closed_form, rows))
+
+
+def cached_simulate_debt(data: DebtInputs, rows: bool = True, closed_form: bool = True):
+    """:func:`backend.core.calc.simulate_debt` through :data:`debt_cache`."""
+    key = (freeze_debt(data), rows, closed_form)
+    return debt_cache.get_or_compute(key, lambda: simulate_debt(data, rows=rows, closed_form=closed_form))
+
+
+def cached_simulate_mc(p: Inputs, runs: Optional[int] = None, seed: Optional[int] = None, **kwargs):
+    """:func:`backend.core.montecarlo.simulate_mc` through :data:`mc_cache`.
+
+    The key covers ``p``, ``runs``, ``seed`` and the keyword options (except
+    ``cancel``/``executor``/``workers``, which do not change the result). With
+    ``seed=None`` the first draw is reused for identical inputs.
+    """
+    from backend.core.montecarlo import simulate_mc  # numpy solo cuando hace falta
+
+    options = tuple(sorted(
+        (name, tuple(value) if isinstance(value, (list, range)) else value)
+        for name, value in kwargs.items()
+        if name not in ("cancel", "executor", "workers")
+    ))
+    key = (freeze_inputs(p), runs, seed, options)
+    return mc_cache.get_or_compute(key, lambda: simulate_mc(p, runs=runs, seed=seed, **kwargs))
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {
+        "invest": invest_cache.stats(),
+        "projection": projection_cache.stats(),
+        "debt": debt_cache.stats(),
+        "montecarlo": mc_cache.stats(),
+    }
+
+
+__all__ = [
+    "SimulationCache",
+    "freeze_inputs",
+    "MC_FIELDS",
+    "freeze_debt",
+    "cached_simulate",
+    "projection_for",
+    "cached_simulate_debt",
+    "cached_simulate_mc",
+    "cache_stats",
+    "invest_cache",
+    "debt_cache",
+    "mc_cache",
+    "projection_cache",
+]
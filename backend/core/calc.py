@@ -0,0 +1,499 @@
+"""
+calc.py
+-------
+Motor de amortización de créditos sin interfaz gráfica.
+
+Reúne en un solo lugar la tabla de amortización que estaba duplicada en
+``App._simulate_debt`` (frontend/funcion.py) y en
+``frontend/screens/debt_screen.py``. Los mensajes de error se levantan como
+:class:`DebtError` con la clave de i18n correspondiente para que la interfaz
+los traduzca.
+
+:func:`simulate_debt_batch` avanza miles de créditos a la vez (un arreglo por
+campo) con las mismas reglas y devuelve el resumen en columnas.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Sequence, Set, Tuple
+
+from backend.core._np import np, require_numpy
+
+DebtRow = Tuple[int, float, float, float, float, float, float, float]
+
+DEBT_COLUMNS = ("month", "payment", "interest", "principal", "fees", "balance", "interest_acc", "real")
+SUMMARY_FIELDS = ("months", "total_paid", "total_interest", "total_fees", "real_cost")
+
+# Meses adicionales al plazo antes de declarar que el crédito no se liquida.
+MAX_EXTRA_MONTHS = 600
+# Desde el último pago programado, un saldo residual de redondeo se liquida en
+# ese mismo pago, igual que en la forma cerrada, en lugar de abrir un mes más
+# con su seguro. El ciclo amplifica el error de redondeo por (1 + r) cada mes,
+# así que el residuo se mide contra un centavo o contra el pago, lo que sea
+# mayor. Un residuo real (p. ej. por un mes sin pago) es del orden del pago.
+PAID_TOLERANCE = 0.01
+PAID_TOLERANCE_REL = 1e-3
+
+
+@dataclass
+class DebtInputs:
+
+    title: str
+    cost: float
+    down_payment: float
+    cat_annual: float
+    open_pct: float
+    insurance_monthly: float
+    term_months: int
+    extra_months: Set[int] = field(default_factory=set)
+    extra_amount: float = 0.0
+    skip_months: Set[int] = field(default_factory=set)
+    inflation_annual: float = 0.0
+
+
+class DebtError(ValueError):
+    """Invalid or non-amortizing credit; ``key`` is the i18n string id."""
+
+    def __init__(self, key: str, message: str) -> None:
+        super().__init__(message)
+        self.key = key
+
+
+def _invalid_amount() -> DebtError:
+    return DebtError("debt_invalid_amount", "Necesitas que el monto financiado sea positivo.")
+
+
+def _not_liquidated() -> DebtError:
+    return DebtError("debt_not_liquidated", "El crédito no se liquida con los parámetros actuales.")
+
+
+def parse_month_list(text: str) -> Set[int]:
+    """Parse ``"3, 6,12"`` into ``{3, 6, 12}``; ignores junk and months outside 1..12."""
+    months: Set[int] = set()
+    if not text:
+        return months
+    for chunk in text.replace(" ", "").split(","):
+        if not chunk:
+            continue
+        try:
+            month = int(float(chunk))
+        except Exception:
+            continue
+        if 1 <= month <= 12:
+            months.add(month)
+    return months
+
+
+def monthly_rate(cat_annual: float) -> float:
+    """Effective monthly rate for an annual CAT in percent."""
+    return (1.0 + cat_annual / 100.0) ** (1.0 / 12.0) - 1.0 if cat_annual else 0.0
+
+
+def is_regular_debt(data: DebtInputs) -> bool:
+    """True when no month is skipped and no extra payment applies: the
+    schedule is then a plain annuity with a closed form."""
+    return not data.skip_months and (not data.extra_months or data.extra_amount <= 0)
+
+
+def _annuity_payment(principal: float, rate: float, term: int) -> float:
+    if rate > 0:
+        payment = rate * principal / (1.0 - (1.0 + rate) ** (-term))
+    else:
+        payment = principal / term
+    return max(payment, 0.0)
+
+
+def _summary(months: int, total_paid: float, total_interest: float, total_fees: float, base_inflation: float) -> Dict[str, float]:
+    total_paid_with_fees = total_paid + total_fees
+    if base_inflation > 0:
+        real_cost = total_paid_with_fees / (base_inflation ** (months / 12.0))
+    else:
+        real_cost = total_paid_with_fees
+    return {
+        "months": months,
+        "total_paid": total_paid_with_fees,
+        "total_interest": total_interest,
+        "total_fees": total_fees,
+        "real_cost": real_cost,
+    }
+
+
+def simulate_debt(data: DebtInputs, rows: bool = True, closed_form: bool = True) -> Tuple[List[DebtRow], Dict[str, float]]:
+    """Month-by-month amortization schedule and summary.
+
+    Rows follow :data:`DEBT_COLUMNS`. Note that ``extra_months`` and
+    ``skip_months`` are matched against the absolute month number (as the
+    legacy screens did), so they only act during the first year.
+
+    Without irregular payments (:func:`is_regular_debt`) the schedule comes
+    from the annuity formulas instead of the month loop; pass
+    ``closed_form=False`` to force the loop. ``rows=False`` returns an empty
+    row list and only the summary (O(1) in the closed-form case).
+    """
+    principal = data.cost - data.down_payment
+    if principal <= 0:
+        raise _invalid_amount()
+    if closed_form and is_regular_debt(data):
+        return _debt_closed(data, principal, rows)
+    return _debt_steps(data, principal, rows)
+
+
+def _debt_closed(data: DebtInputs, principal: float, rows: bool) -> Tuple[List[DebtRow], Dict[str, float]]:
+    """Annuity schedule in closed form.
+
+    With ``A`` the payment, the balance after month ``k`` of ``n`` is
+    ``A * (1 - (1 + r)^-(n - k)) / r`` (``A * (n - k)`` when ``r <= 0``, where
+    the loop charges no interest), interest is ``r`` times the previous
+    balance and the interest accumulated up to ``k`` is
+    ``k * A - (principal - B_k)``.
+    """
+    rate = monthly_rate(data.cat_annual)
+    term = max(data.term_months, 1)
+    payment = _annuity_payment(principal, rate, term)
+    open_fee = max(0.0, data.open_pct / 100.0 * data.cost)
+    base_inflation = 1.0 + data.inflation_annual / 100.0
+    total_interest = term * payment - principal if rate > 0 else 0.0
+    total_fees = data.insurance_monthly * term + open_fee
+    summary = _summary(term, principal + total_interest, total_interest, total_fees, base_inflation)
+    if not rows:
+        return [], summary
+
+    if rate > 0:
+        log_v = -math.log1p(rate)
+        balances = [payment * -math.expm1((term - k) * log_v) / rate for k in range(term + 1)]
+    else:
+        rate = 0.0
+        balances = [payment * (term - k) for k in range(term + 1)]
+    balances[0] = principal
+    balances[term] = 0.0
+    out: List[DebtRow] = []
+    for k in range(1, term + 1):
+        prev, balance = balances[k - 1], balances[k]
+        interest = max(prev * rate, 0.0)
+        if k < term:
+            payment_total = payment
+            principal_payment = payment - interest
+            interest_acc = k * payment - (principal - balance)
+        else:
+            principal_payment = prev
+            payment_total = interest + prev
+            interest_acc = total_interest
+        fees = data.insurance_monthly + (open_fee if k == 1 else 0.0)
+        real_balance = balance / (base_inflation ** (k / 12.0)) if base_inflation > 0 else balance
+        out.append((k, payment_total, interest, principal_payment, fees, balance, interest_acc, real_balance))
+    return out, summary
+
+
+def _debt_steps(data: DebtInputs, principal: float, rows: bool) -> Tuple[List[DebtRow], Dict[str, float]]:
+    """Month loop; handles skipped months and extra payments."""
+    rate = monthly_rate(data.cat_annual)
+    term = max(data.term_months, 1)
+    payment = _annuity_payment(principal, rate, term)
+
+    balance = principal
+    out: List[DebtRow] = []
+    total_interest = 0.0
+    total_paid = 0.0
+    total_fees = 0.0
+    interest_acc = 0.0
+    month = 0
+    open_fee = max(0.0, data.open_pct / 100.0 * data.cost)
+    inflation_rate = data.inflation_annual / 100.0
+    base_inflation = 1.0 + inflation_rate
+    max_months = term + MAX_EXTRA_MONTHS
+    residual = max(PAID_TOLERANCE, payment * PAID_TOLERANCE_REL)
+
+    while balance > 0 and month < max_months:
+        month += 1
+        interest = balance * rate if rate else 0.0
+        interest = max(interest, 0.0)
+        scheduled_payment = payment
+        principal_payment = 0.0
+
+        if month in data.skip_months:
+            scheduled_payment = interest
+            principal_payment = 0.0
+        else:
+            principal_payment = max(scheduled_payment - interest, 0.0)
+            if principal_payment > balance:
+                principal_payment = balance
+                scheduled_payment = interest + principal_payment
+
+        balance -= principal_payment
+
+        extra = 0.0
+        if month in data.extra_months and month not in data.skip_months and data.extra_amount > 0 and balance > 0:
+            extra = min(data.extra_amount, balance)
+            balance -= extra
+            principal_payment += extra
+
+        if month >= term and 0 < balance < residual:
+            principal_payment += balance
+            scheduled_payment += balance
+            balance = 0.0
+
+        payment_total = scheduled_payment + extra
+        fees = data.insurance_monthly
+        if month == 1:
+            fees += open_fee
+
+        total_interest += interest
+        total_fees += fees
+        total_paid += payment_total
+        interest_acc += interest
+
+        if not rows:
+            continue
+        if base_inflation > 0:
+            real_balance = balance / (base_inflation ** (month / 12.0))
+        else:
+            real_balance = balance
+
+        out.append(
+            (
+                month,
+                payment_total,
+                interest,
+                principal_payment,
+                fees,
+                balance,
+                interest_acc,
+                real_balance,
+            )
+        )
+
+    if balance > 0:
+        raise _not_liquidated()
+
+    return out, _summary(month, total_paid, total_interest, total_fees, base_inflation)
+
+
+# --------------------------------------------------------------------------- batch
+
+_NUMERIC_FIELDS = (
+    "cost", "down_payment", "cat_annual", "open_pct", "insurance_monthly",
+    "term_months", "extra_amount", "inflation_annual",
+)
+
+
+def _month_mask(months: Set[int]) -> "np.ndarray":
+    row = np.zeros(12, dtype=bool)
+    for m in months:
+        if 1 <= m <= 12:
+            row[m - 1] = True
+    return row
+
+
+def stack_debts(items: Sequence[DebtInputs]) -> Dict[str, "np.ndarray"]:
+    """Convert ``DebtInputs`` into the columns used by :func:`simulate_debt_batch`.
+
+    Month sets become ``(n, 12)`` boolean masks ``extra_mask`` / ``skip_mask``.
+    """
+    require_numpy("el motor batch")
+    out: Dict[str, np.ndarray] = {
+        name: np.array([getattr(d, name) for d in items], dtype=float) for name in _NUMERIC_FIELDS
+    }
+    out["extra_mask"] = np.array([_month_mask(d.extra_months) for d in items], dtype=bool).reshape(-1, 12)
+    out["skip_mask"] = np.array([_month_mask(d.skip_months) for d in items], dtype=bool).reshape(-1, 12)
+    return out
+
+
+def simulate_debt_batch(data, rows: bool = False, closed_form: bool = True) -> Dict[str, "np.ndarray"]:
+    """Amortize every credit in ``data`` at once and return columnar results.
+
+    ``data`` is a list of :class:`DebtInputs` or the mapping returned by
+    :func:`stack_debts`. The result maps each of :data:`SUMMARY_FIELDS` to an
+    ``(n,)`` array plus ``ok`` (``False`` where :func:`simulate_debt` would
+    raise; those summaries are ``NaN``). With ``rows=True`` it also holds
+    ``schedule``: ``(n, max_months, 8)`` in :data:`DEBT_COLUMNS` order,
+    ``NaN`` past each credit's last month.
+
+    Credits without skipped months or extra payments use the annuity closed
+    form (as :func:`simulate_debt`); only the rest go through the month loop.
+    """
+    require_numpy("el motor batch")
+    cols: Mapping[str, np.ndarray] = data if isinstance(data, Mapping) else stack_debts(data)
+    cost = cols["cost"]
+    n = len(cost)
+    principal = cost - cols["down_payment"]
+    term = np.maximum(cols["term_months"].astype(np.int64), 1)
+    # Tasa y pago por crédito con ``pow`` escalar: el ``pow`` vectorizado de
+    # NumPy puede diferir en un ulp y mover el último mes de la tabla.
+    rate = np.array([monthly_rate(c) for c in cols["cat_annual"].tolist()])
+    payment = np.array([
+        _annuity_payment(p, r, t) for r, p, t in zip(rate.tolist(), principal.tolist(), term.tolist())
+    ])
+    extra_mask = cols["extra_mask"] & (cols["extra_amount"] > 0)[:, None]
+    skip_mask = cols["skip_mask"]
+    terms = {
+        "principal": principal, "rate": rate, "term": term, "payment": payment,
+        "open_fee": np.maximum(0.0, cols["open_pct"] / 100.0 * cost),
+        "insurance": cols["insurance_monthly"],
+        "extra_amount": cols["extra_amount"],
+        "base": 1.0 + cols["inflation_annual"] / 100.0,
+        "extra_mask": extra_mask,
+        "skip_mask": skip_mask,
+    }
+
+    valid = principal > 0
+    regular = ~(extra_mask.any(axis=1) | skip_mask.any(axis=1)) if closed_form else np.zeros(n, dtype=bool)
+    months = np.zeros(n, dtype=np.int64)
+    totals = np.full((n, 3), np.nan)  # pagado (sin comisiones), intereses, comisiones
+    ok = np.zeros(n, dtype=bool)
+    parts = []
+    for idx, kernel in ((np.nonzero(valid & regular)[0], _closed_batch), (np.nonzero(valid & ~regular)[0], _steps_batch)):
+        if not idx.size:
+            continue
+        sub = {name: arr[idx] for name, arr in terms.items()}
+        m, t, good, sched = kernel(sub, rows)
+        months[idx], totals[idx], ok[idx] = m, t, good
+        if rows:
+            parts.append((idx, sched))
+
+    base = terms["base"]
+    deflate = base > 0
+    safe_base = np.where(deflate, base, 1.0)
+    total_paid_with_fees = totals[:, 0] + totals[:, 2]
+    real_cost = np.where(deflate, total_paid_with_fees / safe_base ** (months / 12.0), total_paid_with_fees)
+    out: Dict[str, np.ndarray] = {
+        "months": months,
+        "total_paid": np.where(ok, total_paid_with_fees, np.nan),
+        "total_interest": np.where(ok, totals[:, 1], np.nan),
+        "total_fees": np.where(ok, totals[:, 2], np.nan),
+        "real_cost": np.where(ok, real_cost, np.nan),
+        "ok": ok,
+    }
+    if rows:
+        width = max((sched.shape[1] for _idx, sched in parts), default=0)
+        schedule = np.full((n, width, len(DEBT_COLUMNS)), np.nan)
+        for idx, sched in parts:
+            schedule[idx, :sched.shape[1]] = sched
+        out["schedule"] = schedule
+    return out
+
+
+def _real(balance, base, month):
+    deflate = base > 0
+    return np.where(deflate, balance / np.where(deflate, base, 1.0) ** (month / 12.0), balance)
+
+
+def _closed_batch(c: Mapping[str, "np.ndarray"], rows: bool):
+    """Closed-form annuities (see :func:`_debt_closed`); every credit liquidates at ``term``."""
+    principal, rate, term, payment = c["principal"], c["rate"], c["term"], c["payment"]
+    positive = rate > 0
+    total_interest = np.where(positive, term * payment - principal, 0.0)
+    totals = np.stack([principal + total_interest, total_interest, c["insurance"] * term + c["open_fee"]], axis=1)
+    ok = np.ones(len(principal), dtype=bool)
+    if not rows:
+        return term, totals, ok, None
+
+    width = int(term.max())
+    k = np.arange(width + 1, dtype=float)[None, :]
+    remaining = term[:, None] - k
+    safe_rate = np.where(positive, rate, 1.0)[:, None]
+    balances = np.where(
+        positive[:, None],
+        payment[:, None] * -np.expm1(-remaining * np.log1p(safe_rate)) / safe_rate,
+        payment[:, None] * remaining,
+    )
+    balances[:, 0] = principal
+    balances = np.where(remaining > 0, balances, 0.0)
+    prev, balance = balances[:, :-1], balances[:, 1:]
+    month = k[:, 1:]
+    r = np.where(positive, rate, 0.0)[:, None]
+    interest = np.maximum(prev * r, 0.0)
+    last = month == term[:, None]
+    pay = np.broadcast_to(payment[:, None], prev.shape)
+    principal_payment = np.where(last, prev, pay - interest)
+    payment_total = np.where(last, interest + prev, pay)
+    interest_acc = np.where(last, total_interest[:, None], month * pay - (principal[:, None] - balance))
+    fees = np.broadcast_to(c["insurance"][:, None], prev.shape).copy()
+    fees[:, 0] += c["open_fee"]
+    real = _real(balance, c["base"][:, None], month)
+    sched = np.stack(
+        [np.broadcast_to(month, prev.shape), payment_total, interest, principal_payment, fees, balance, interest_acc, real],
+        axis=2,
+    )
+    sched[month > term[:, None]] = np.nan
+    return term, totals, ok, sched
+
+
+def _steps_batch(c: Mapping[str, "np.ndarray"], rows: bool):
+    """Vectorized month loop over credits with skipped months or extra payments."""
+    rate, payment = c["rate"], c["payment"]
+    insurance, open_fee, extra_amount = c["insurance"], c["open_fee"], c["extra_amount"]
+    extra_mask, skip_mask = c["extra_mask"], c["skip_mask"]
+    n = len(rate)
+    max_months = c["term"] + MAX_EXTRA_MONTHS
+
+    balance = c["principal"].copy()
+    months = np.zeros(n, dtype=np.int64)
+    total_interest = np.zeros(n)
+    total_paid = np.zeros(n)
+    total_fees = np.zeros(n)
+    schedule: List[np.ndarray] = []
+    no_flags = np.zeros(n, dtype=bool)
+
+    term = c["term"]
+    residual = np.maximum(PAID_TOLERANCE, payment * PAID_TOLERANCE_REL)
+    active = balance > 0
+    month = 0
+    while active.any():
+        month += 1
+        interest = np.maximum(balance * rate, 0.0)
+        if month <= 12:
+            skip = skip_mask[:, month - 1]
+            extra_on = extra_mask[:, month - 1] & ~skip
+        else:
+            skip = extra_on = no_flags
+        principal_payment = np.where(skip, 0.0, np.maximum(payment - interest, 0.0))
+        capped = ~skip & (principal_payment > balance)
+        principal_payment = np.where(capped, balance, principal_payment)
+        scheduled = np.where(skip, interest, np.where(capped, interest + principal_payment, payment))
+        new_balance = balance - principal_payment
+        extra = np.where(extra_on & (new_balance > 0), np.minimum(extra_amount, new_balance), 0.0)
+        new_balance = new_balance - extra
+        principal_payment = principal_payment + extra
+        dust = (month >= term) & (new_balance > 0) & (new_balance < residual)
+        principal_payment = np.where(dust, principal_payment + new_balance, principal_payment)
+        scheduled = np.where(dust, scheduled + new_balance, scheduled)
+        new_balance = np.where(dust, 0.0, new_balance)
+        payment_total = scheduled + extra
+        fees = insurance + open_fee if month == 1 else insurance
+
+        balance = np.where(active, new_balance, balance)
+        total_interest += np.where(active, interest, 0.0)
+        total_fees += np.where(active, fees, 0.0)
+        total_paid += np.where(active, payment_total, 0.0)
+        months += active
+
+        if rows:
+            step = np.stack(
+                [np.full(n, float(month)), payment_total, interest, principal_payment,
+                 fees, balance, total_interest.copy(), _real(balance, c["base"], month)],
+                axis=1,
+            )
+            step[~active] = np.nan
+            schedule.append(step)
+
+        active &= (balance > 0) & (month < max_months)
+
+    totals = np.stack([total_paid, total_interest, total_fees], axis=1)
+    sched = np.stack(schedule, axis=1) if rows and schedule else None
+    return months, totals, balance <= 0, sched
+
+
+__all__ = [
+    "DebtInputs",
+    "DebtError",
+    "DEBT_COLUMNS",
+    "SUMMARY_FIELDS",
+    "parse_month_list",
+    "monthly_rate",
+    "simulate_debt",
+    "is_regular_debt",
+    "stack_debts",
+    "simulate_debt_batch",
+]
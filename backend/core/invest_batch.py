@@ -0,0 +1,304 @@
+"""
+invest_batch.py
+---------------
+Motor de proyección vectorizado (NumPy) para barridos de miles de escenarios.
+
+Recibe una estructura de arreglos (un arreglo por campo de ``Inputs``) y
+avanza todos los escenarios a la vez, paso por paso, con las mismas reglas que
+:func:`backend.core.invest_calc.simulate`: frecuencias quincenal/mensual/anual,
+aporte al inicio o al final, calendarios de extras/pausas, retenciones por
+instrumento y costos de salida.
+
+El resultado es un arreglo ``(n_escenarios, años, 7)`` con las columnas de
+``YearRow`` en el orden de :data:`YEAR_COLUMNS`. Los años posteriores al
+horizonte de cada escenario quedan en ``NaN``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, fields
+from typing import Callable, Dict, Mapping, Optional, Sequence
+
+from backend.core._np import np, require_numpy
+from backend.core.invest_calc import Inputs, parse_months, step_calendar, steps_per_year
+
+YEAR_COLUMNS = ("year", "final_balance", "cum_contrib", "gain", "real_value", "fees", "taxes")
+
+_DEFAULTS = {f.name: f.default for f in fields(Inputs)}
+_TEXT_FIELDS = ("instrument", "country", "div_policy", "frequency", "timing", "extra_months", "skip_months")
+
+
+def stack_inputs(items: Sequence[Inputs]) -> Dict[str, "np.ndarray"]:
+    """Convert a list of ``Inputs`` into the structure-of-arrays used by :func:`simulate_batch`."""
+    require_numpy("el motor batch")
+    rows = [asdict(p) for p in items]
+    out: Dict[str, np.ndarray] = {}
+    for name in _DEFAULTS:
+        values = [r[name] for r in rows]
+        out[name] = np.asarray(values, dtype=object if name in _TEXT_FIELDS else float)
+    return out
+
+
+def _column(data: Mapping[str, object], name: str, n: int, dtype) -> "np.ndarray":
+    value = data.get(name, _DEFAULTS[name])
+    arr = np.asarray(value, dtype=dtype)
+    if arr.ndim == 0:
+        arr = np.full(n, arr.item() if dtype is not object else value, dtype=dtype)
+    if arr.shape != (n,):
+        raise ValueError(f"El campo '{name}' debe tener longitud {n}.")
+    return arr
+
+
+def _month_masks(values: "np.ndarray") -> "np.ndarray":
+    """Parse month lists (``"6,12"``) into an ``(n, 12)`` boolean mask, parsing each distinct text once."""
+    cache: Dict[str, np.ndarray] = {}
+    masks = np.zeros((len(values), 12), dtype=bool)
+    for i, text in enumerate(values):
+        key = text or ""
+        row = cache.get(key)
+        if row is None:
+            row = np.zeros(12, dtype=bool)
+            for m in parse_months(key):
+                row[m - 1] = True
+            cache[key] = row
+        masks[i] = row
+    return masks
+
+
+def _batch_size(data: Mapping[str, object]) -> int:
+    for value in data.values():
+        arr = np.asarray(value, dtype=object)
+        if arr.ndim == 1:
+            return len(arr)
+    return 1
+
+
+def simulate_batch(data: Mapping[str, object]) -> "np.ndarray":
+    """Project every scenario in ``data`` and return a ``(n, max_years, 7)`` array.
+
+    ``data`` maps ``Inputs`` field names to 1-D arrays (or scalars, broadcast to
+    every scenario). Missing fields take the ``Inputs`` default.
+    """
+    require_numpy("el motor batch")
+    n = _batch_size(data)
+    cols = {name: _column(data, name, n, object if name in _TEXT_FIELDS else float) for name in _DEFAULTS}
+    years = np.maximum(cols["years"].astype(np.int64), 0)
+    max_years = int(years.max()) if n else 0
+    out = np.full((n, max_years, len(YEAR_COLUMNS)), np.nan)
+    if n == 0 or max_years == 0:
+        return out
+    steps = np.array([steps_per_year(f) for f in cols["frequency"]], dtype=np.int64)
+    extra_mask = _month_masks(cols["extra_months"])
+    skip_mask = _month_masks(cols["skip_months"])
+    for group_steps in np.unique(steps):
+        idx = np.nonzero((steps == group_steps) & (years > 0))[0]
+        if idx.size:
+            sub = {name: arr[idx] for name, arr in cols.items()}
+            out[idx, :max_years] = _run_group(sub, int(group_steps), years[idx], extra_mask[idx], skip_mask[idx], max_years)
+    return out
+
+
+def simulate_paths(p: Inputs, step_returns: Callable[[int], "np.ndarray"], paths: int) -> "np.ndarray":
+    """Final balances of ``paths`` copies of ``p`` under per-path random returns.
+
+    ``step_returns(step)`` gives the ``(paths,)`` vector of simple returns for
+    step ``step`` (1-based) and replaces the fixed ``annual_return`` rate;
+    fees, withholding, dividends, yearly ISR and exit costs run through the
+    same kernel as :func:`simulate_batch`.
+    """
+    require_numpy("el motor batch")
+    years = max(0, int(p.years))
+    if years == 0 or paths <= 0:
+        return np.full(max(paths, 0), float(p.initial))
+    # Parámetros 0-d: todas las trayectorias comparten los mismos Inputs.
+    cols = {name: np.asarray(value, dtype=object if name in _TEXT_FIELDS else float) for name, value in asdict(p).items()}
+    extra_mask = _month_masks(np.array([p.extra_months], dtype=object))
+    skip_mask = _month_masks(np.array([p.skip_months], dtype=object))
+    out = _run_group(
+        cols, steps_per_year(p.frequency), np.full(paths, years, dtype=np.int64),
+        extra_mask, skip_mask, years, step_returns=step_returns,
+    )
+    return out[:, years - 1, 1]
+
+
+def _uniform(mask):
+    """Collapse an all-true/all-false mask to a bool so the kernel can skip ``np.where``."""
+    if mask.all():
+        return True
+    if not mask.any():
+        return False
+    return mask
+
+
+def _run_group(c, steps, years, extra_mask, skip_mask, max_years, step_returns: Optional[Callable] = None):
+    """Step every scenario of one frequency together; see ``invest_calc.simulate``.
+
+    Fields in ``c`` may be ``(n,)`` arrays or 0-d arrays shared by every
+    scenario (the Monte Carlo case), in which case the deposit arithmetic runs
+    once per step instead of once per path. State is updated in place.
+    """
+    n = len(years)
+    horizon = int(years.max())
+    step_months = 12.0 / steps
+    r_step = (1.0 + c["annual_return"] / 100.0) ** (step_months / 12.0) - 1.0
+    mgmt_step = (c["mgmt"] / 100.0) * (step_months / 12.0)
+    infl_y = c["inflation"] / 100.0
+    g_step = (1.0 + c["contrib_growth"] / 100.0) ** (step_months / 12.0) - 1.0
+    div_step = (c["div_yield"] / 100.0) * (step_months / 12.0)
+    instrument = c["instrument"]
+    is_mx_stock = instrument == "mx_stock"
+    div_withhold = np.where(is_mx_stock, 0.10, 0.0)
+    div_withhold = np.where(instrument == "usa_stock", np.where(c["w8ben"].astype(bool), 0.10, 0.30), div_withhold)
+    debt_withhold_step = np.where(instrument == "mx_debt", (c["tax_gain"] / 100.0) * (step_months / 12.0), 0.0)
+    fee_rate = c["fee_deposit"] / 100.0
+    vat = c["vat_on_fees"] / 100.0
+    tax_rate = c["tax_gain"] / 100.0
+    is_begin = c["timing"] == "begin"
+    is_end = c["timing"] == "end"
+    custody = np.where(c["custody_fixed"] > 0.0, c["custody_fixed"] * (step_months / 1.0), 0.0)
+    platform = np.where(c["platform_fixed"] > 0.0, c["platform_fixed"] * (step_months / 1.0), 0.0)
+    fixed_fee = custody + platform
+    fixed_fee_with_vat = (custody + custody * vat) + (platform + platform * vat)
+    extra_amount = c["extra_amount"]
+    has_mgmt = bool((mgmt_step > 0).any())
+    has_fixed = bool((fixed_fee > 0).any())
+    withhold_on = _uniform(debt_withhold_step > 0)
+    div_on = _uniform(div_step > 0)
+    div_reinvest = _uniform((div_step > 0) & (c["div_policy"] == "reinvest"))
+    yearly_tax = _uniform(~is_mx_stock)
+
+    def _state(value):
+        return np.array(np.broadcast_to(value, (n,)), dtype=float)
+
+    balance = _state(c["initial"])
+    cum_contrib = _state(c["initial"])
+    dep_current = c["monthly"].copy()
+    fees_year = np.zeros(n)
+    taxes_year = np.zeros(n)
+    net_in_year = np.zeros(n)
+    start_balance_year = balance.copy()
+    tmp = np.empty(n)
+    buf = np.empty(n)
+    out = np.full((n, max_years, len(YEAR_COLUMNS)), np.nan)
+    # Calendario del grupo, resuelto una vez por mes y no en cada paso.
+    calendar = step_calendar(steps)
+    skip_by_month = [_uniform(skip_mask[:, m]) for m in range(12)]
+    extra_by_month = []
+    for m in range(12):
+        extra_now = _uniform(extra_mask[:, m])
+        extra_by_month.append(None if extra_now is False else np.where(extra_now, extra_amount, 0.0))
+
+    def _deposit(mask, dep):
+        mask = _uniform(mask)
+        if mask is False:
+            return
+        fee_dep = dep * fee_rate
+        iva_dep = fee_dep * vat
+        net_dep = dep - fee_dep
+        if mask is True:
+            np.add(balance, net_dep, out=balance)
+            np.add(cum_contrib, dep, out=cum_contrib)
+            np.add(net_in_year, net_dep, out=net_in_year)
+            np.add(fees_year, fee_dep + iva_dep, out=fees_year)
+            return
+        np.add(balance, np.where(mask, net_dep, 0.0), out=balance)
+        np.add(cum_contrib, np.where(mask, dep, 0.0), out=cum_contrib)
+        np.add(net_in_year, np.where(mask, net_dep, 0.0), out=net_in_year)
+        np.add(fees_year, np.where(mask, fee_dep + iva_dep, 0.0), out=fees_year)
+
+    year = 1
+    for step in range(1, horizon * steps + 1):
+        month_idx, first_in_month = calendar[(step - 1) % len(calendar)]
+        skip_now = skip_by_month[month_idx - 1]
+        dep = dep_current if skip_now is False else np.where(skip_now, 0.0, dep_current)
+        if first_in_month:
+            extra_now = extra_by_month[month_idx - 1]
+            if extra_now is not None:
+                dep = dep + extra_now
+        positive = dep > 0
+        _deposit(is_begin & positive, dep)
+        if has_mgmt:
+            np.multiply(balance, mgmt_step, out=tmp)
+            balance -= tmp
+            np.multiply(tmp, vat, out=buf)
+            buf += tmp
+            fees_year += buf
+        if has_fixed:
+            balance -= fixed_fee
+            fees_year += fixed_fee_with_vat
+        np.multiply(balance, r_step if step_returns is None else step_returns(step), out=tmp)
+        balance += tmp
+        if withhold_on is not False:
+            np.multiply(tmp, debt_withhold_step, out=buf)
+            buf[tmp <= 0] = 0.0
+            if withhold_on is not True:
+                buf[~withhold_on] = 0.0
+            balance -= buf
+            taxes_year += buf
+        if div_on is not False:
+            np.multiply(balance, div_step, out=tmp)
+            np.multiply(tmp, div_withhold, out=buf)
+            taxes_year += buf if div_on is True else np.where(div_on, buf, 0.0)
+            tmp -= buf
+            if div_reinvest is True:
+                balance += tmp
+            elif div_reinvest is not False:
+                balance += np.where(div_reinvest, tmp, 0.0)
+        _deposit(is_end & positive, dep)
+        dep_current = dep_current * (1.0 + g_step)
+        if step % steps == 0:
+            if yearly_tax is not False:
+                gain_before_tax = balance - start_balance_year - net_in_year
+                tax_on = gain_before_tax > 0 if yearly_tax is True else yearly_tax & (gain_before_tax > 0)
+                tax = np.where(tax_on, gain_before_tax * tax_rate, 0.0)
+                taxes_year += tax
+                balance -= tax
+            row = out[:, year - 1]
+            row[:, 0] = year
+            row[:, 1] = balance
+            row[:, 2] = cum_contrib
+            row[:, 3] = balance - cum_contrib
+            row[:, 4] = balance / ((1.0 + infl_y) ** year)
+            row[:, 5] = fees_year
+            row[:, 6] = taxes_year
+            start_balance_year[:] = balance
+            fees_year.fill(0.0)
+            taxes_year.fill(0.0)
+            net_in_year.fill(0.0)
+            year += 1
+
+    rows = np.arange(n)
+    last = out[rows, years - 1]
+    _apply_exit_costs(c, last, infl_y, vat, tax_rate, is_mx_stock, years)
+    out[rows, years - 1] = last
+    out[np.arange(max_years)[None, :] >= years[:, None]] = np.nan
+    return out
+
+
+def _apply_exit_costs(c, last, infl_y, vat, tax_rate, is_mx_stock, years) -> None:
+    """Vectorized ``invest_calc._apply_exit_costs`` on the horizon row of each scenario (in place)."""
+    balance = last[:, 1].copy()
+    fees = last[:, 5].copy()
+    taxes = last[:, 6].copy()
+    for field_name, with_vat in (("buy_sell", True), ("sell_fee", True), ("market_spread", False), ("exit_spread", False)):
+        pct = c[field_name]
+        on = pct > 0
+        if not on.any():
+            continue
+        fee = balance * (pct / 100.0)
+        balance = np.where(on, balance - fee, balance)
+        fees = np.where(on, fees + fee, fees)
+        if with_vat:
+            fees = np.where(on, fees + fee * vat, fees)
+    cum_contrib = last[:, 2]
+    tax_final = np.maximum(0.0, balance - cum_contrib) * tax_rate
+    balance = np.where(is_mx_stock, balance - tax_final, balance)
+    taxes = np.where(is_mx_stock, taxes + tax_final, taxes)
+    last[:, 1] = balance
+    last[:, 3] = balance - cum_contrib
+    last[:, 4] = balance / ((1.0 + infl_y) ** years)
+    last[:, 5] = fees
+    last[:, 6] = taxes
+
+
+__all__ = ["YEAR_COLUMNS", "stack_inputs", "simulate_batch", "simulate_paths"]
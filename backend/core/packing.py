@@ -0,0 +1,210 @@
+"""
+packing.py
+----------
+Formato binario por columnas para los resultados de la API de simulación.
+
+Codificar en JSON miles de flotantes por escenario es lo más caro de servir
+proyecciones en volumen. Este formato los manda tal cual: float64
+little-endian, columna por columna, con un encabezado pequeño, para que el
+cliente los mapee directo a arreglos (``numpy.frombuffer``) sin parsear.
+
+Diseño (todo little-endian)::
+
+    0    4s   magia b"CALC"
+    4    u16  versión (1)
+    6    u16  tipo: 1 inversión, 2 crédito, 3 Monte Carlo
+    8    u32  N escenarios
+    12   u32  R filas en total
+    16   u16  S campos de resumen
+    18   u16  C columnas de tabla
+    20   u32  L bytes de nombres
+    24   L    nombres UTF-8 separados por "," (S de resumen y luego C de
+              columnas), rellenos con ceros hasta múltiplo de 8
+    H    i64  [N + 1] desplazamientos de fila: el escenario i ocupa las filas
+              offsets[i]:offsets[i + 1] de cada columna
+    ...  f64  [N * S] resúmenes, escenario por escenario
+    ...  f64  [C * R] columnas, una tras otra
+
+Todas las secciones quedan alineadas a 8 bytes. Un escenario que no se pudo
+calcular (p. ej. un crédito que no se liquida) lleva el resumen en ``NaN`` y
+cero filas; el detalle del error solo viaja en JSON.
+
+Si ``pyarrow`` está instalado, :meth:`PackedWriter.to_arrow` produce en su
+lugar un stream Arrow IPC: una fila por escenario, el resumen como columnas
+``float64`` y cada columna de tabla como ``large_list<float64>``.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+try:
+    import pyarrow as pa  # type: ignore
+except Exception:  # pragma: no cover - pyarrow es opcional
+    pa = None  # type: ignore
+
+from backend.core._np import np
+from backend.core.calc import DEBT_COLUMNS, SUMMARY_FIELDS
+from backend.core.invest_calc import ROW_FIELDS
+
+PACKED_MIME = "application/vnd.calculadora.f64"
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+MAGIC = b"CALC"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIIHHI")
+
+# tipo -> (código, campos de resumen, columnas de tabla)
+LAYOUTS: Dict[str, Tuple[int, Tuple[str, ...], Tuple[str, ...]]] = {
+    "investment": (1, ("nominal", "total_contrib", "total_gain", "real_total"), tuple(ROW_FIELDS)),
+    "debt": (2, tuple(SUMMARY_FIELDS), tuple(DEBT_COLUMNS)),
+    "montecarlo": (3, ("p5", "p50", "p95", "runs"), ("percentiles", "quantiles")),
+}
+_KIND_NAMES = {code: kind for kind, (code, _s, _c) in LAYOUTS.items()}
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def _le_bytes(values: array) -> bytes:
+    if _BIG_ENDIAN:  # pragma: no cover
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class PackedWriter:
+    """Accumulates engine results of one ``kind`` column by column.
+
+    :meth:`add` takes what the engines return: a ``Result`` (investment), a
+    ``(rows, summary)`` pair (debt) or a ``MonteCarloResult``; an exception
+    instance records a failed scenario.
+    """
+
+    def __init__(self, kind: str) -> None:
+        if kind not in LAYOUTS:
+            raise ValueError(f"Tipo desconocido: {kind!r}")
+        self.kind = kind
+        self.code, self.summary_fields, self.columns = LAYOUTS[kind]
+        self._offsets = array("q", [0])
+        self._summary = array("d")
+        self._cols = [array("d") for _ in self.columns]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _push(self, summary: Sequence[float], columns: Sequence[Sequence[float]]) -> None:
+        self._summary.extend(summary)
+        n = 0
+        for out, values in zip(self._cols, columns):
+            out.extend(values)
+            n = len(values)
+        self._offsets.append(self._offsets[-1] + n)
+
+    def add(self, result) -> None:
+        if isinstance(result, Exception):
+            self._push([float("nan")] * len(self.summary_fields), [()] * len(self.columns))
+        elif self.kind == "investment":
+            rows = result.rows
+            columns = [
+                array("d", rows.column(name)) if name == "year" else rows.column(name)
+                for name in self.columns
+            ]
+            self._push(result[1:], columns)
+        elif self.kind == "debt":
+            rows, summary = result
+            self._push([summary[name] for name in self.summary_fields], list(zip(*rows)) or [()] * len(self.columns))
+        else:
+            self._push([result.p5, result.p50, result.p95, result.runs], [result.percentiles, result.quantiles])
+
+    def to_bytes(self) -> bytes:
+        names = ",".join(self.summary_fields + self.columns).encode("utf-8")
+        pad = -len(names) % 8
+        header = _HEADER.pack(
+            MAGIC, VERSION, self.code, len(self), self._offsets[-1],
+            len(self.summary_fields), len(self.columns), len(names),
+        )
+        parts = [header, names, b"\0" * pad, _le_bytes(self._offsets), _le_bytes(self._summary)]
+        parts.extend(_le_bytes(col) for col in self._cols)
+        return b"".join(parts)
+
+    def to_arrow(self) -> bytes:
+        """Arrow IPC stream (requires ``pyarrow``)."""
+        if pa is None:
+            raise RuntimeError("pyarrow es necesario para el formato Arrow (pip install pyarrow).")
+        step = len(self.summary_fields)
+        data = {
+            name: pa.array(self._summary[i::step].tolist(), pa.float64())
+            for i, name in enumerate(self.summary_fields)
+        }
+        offsets = pa.array(self._offsets.tolist(), pa.int64())
+        for name, col in zip(self.columns, self._cols):
+            data[name] = pa.LargeListArray.from_arrays(offsets, pa.array(col.tolist(), pa.float64()))
+        table = pa.table(data)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+class Packed(NamedTuple):
+    """Decoded :func:`unpack` payload; arrays are NumPy views when available."""
+
+    kind: str
+    summary_fields: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    offsets: Sequence[int]          # (N + 1,)
+    summary: Sequence[float]        # (N, S) con numpy; plano N * S sin numpy
+    data: Dict[str, Sequence[float]]
+
+    def rows(self, index: int) -> Dict[str, Sequence[float]]:
+        """Table columns of scenario ``index``."""
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        return {name: values[start:stop] for name, values in self.data.items()}
+
+
+def _read(buf, offset: int, count: int, code: str):
+    if np is not None:
+        return np.frombuffer(buf, dtype="<i8" if code == "q" else "<f8", count=count, offset=offset)
+    out = array(code)
+    out.frombytes(bytes(buf[offset:offset + 8 * count]))
+    if _BIG_ENDIAN:  # pragma: no cover
+        out.byteswap()
+    return out
+
+
+def unpack(buf) -> Packed:
+    """Decode :meth:`PackedWriter.to_bytes`; zero-copy with NumPy."""
+    magic, version, code, n, total, n_summary, n_columns, name_len = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("No es un paquete de simulación compatible.")
+    start = _HEADER.size
+    names = bytes(buf[start:start + name_len]).decode("utf-8").split(",")
+    offset = start + name_len + (-name_len % 8)
+    offsets = _read(buf, offset, n + 1, "q")
+    offset += 8 * (n + 1)
+    summary = _read(buf, offset, n * n_summary, "d")
+    if np is not None:
+        summary = summary.reshape(n, n_summary)
+    offset += 8 * n * n_summary
+    data: Dict[str, Sequence[float]] = {}
+    for name in names[n_summary:]:
+        data[name] = _read(buf, offset, total, "d")
+        offset += 8 * total
+    return Packed(_KIND_NAMES[code], tuple(names[:n_summary]), tuple(names[n_summary:]), offsets, summary, data)
+
+
+__all__ = [
+    "PACKED_MIME",
+    "ARROW_MIME",
+    "LAYOUTS",
+    "PackedWriter",
+    "Packed",
+    "unpack",
+    "arrow_available",
+]
@@ -0,0 +1,325 @@
+"""
+payloads.py
+-----------
+Conversión entre JSON y los tipos de los motores, para la API HTTP.
+
+No importa Flask: recibe diccionarios ya decodificados y devuelve
+diccionarios listos para ``jsonify``. Los escenarios se validan campo por
+campo contra ``Inputs``/``DebtInputs`` (tipos, campos desconocidos, valores no
+finitos) y los errores salen como :class:`PayloadError` con el índice del
+escenario, para que el cliente sepa cuál corregir.
+
+También se validan rangos y opciones:
+
+- tasas, crecimiento, inflación y CAT deben ser mayores que -100 % (en -100 %
+  o menos los motores dividen entre cero o sacan raíces de negativos) y todo
+  porcentaje queda acotado por ``MAX_RATE_PCT``; los montos, en valor
+  absoluto, por ``MAX_AMOUNT``. Así ningún escenario válido desborda a
+  ``inf``/``NaN``;
+- los campos de texto con opciones fijas (``frequency``, ``timing``,
+  ``instrument``, ``div_policy``, ``country``) solo aceptan esas opciones;
+- el trabajo por escenario está acotado: ``years <= MAX_YEARS``,
+  ``term_months <= MAX_TERM_MONTHS`` y, en Monte Carlo, ``corridas x años <=
+  MAX_MC_RUN_YEARS``.
+
+Como última defensa, :func:`check_result` rechaza un resultado con valores no
+finitos (que además no son JSON válido).
+
+Las tablas se devuelven por columnas (``{"year": [...], "final_balance":
+[...]}``), que es como las guarda :class:`~backend.core.invest_calc.YearTable`
+y pesa bastante menos que una lista de objetos.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import MISSING, fields
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from backend.core.calc import DEBT_COLUMNS, DebtInputs, parse_month_list
+from backend.core.invest_calc import ROW_FIELDS, Inputs, Result
+
+MAX_SCENARIOS = 1_000
+MAX_YEARS = 100
+MAX_TERM_MONTHS = 1_200
+MAX_MC_RUN_YEARS = 5_000_000    # p. ej. 100,000 corridas a 50 años
+MAX_RATE_PCT = 1_000.0
+MAX_AMOUNT = 1e12
+
+_INVEST_TYPES = {f.name: f.type for f in fields(Inputs)}
+_DEBT_TYPES = {f.name: f.type for f in fields(DebtInputs)}
+_DEBT_REQUIRED = tuple(
+    f.name for f in fields(DebtInputs)
+    if f.name != "title" and f.default is MISSING and f.default_factory is MISSING
+)
+_MONTH_FIELDS = ("extra_months", "skip_months")
+
+_AMOUNT = (-MAX_AMOUNT, MAX_AMOUNT)
+_PCT = (-MAX_RATE_PCT, MAX_RATE_PCT)
+_GROWTH_PCT = (-100.0, MAX_RATE_PCT)
+
+# campo -> (mínimo, máximo), inclusivos salvo -100 %, que es exclusivo
+_INVEST_LIMITS = {
+    "initial": _AMOUNT,
+    "monthly": _AMOUNT,
+    "years": (0, MAX_YEARS),
+    "annual_return": _GROWTH_PCT,
+    "inflation": _GROWTH_PCT,
+    "fee_deposit": _PCT,
+    "buy_sell": _PCT,
+    "mgmt": _PCT,
+    "vat_on_fees": _PCT,
+    "tax_gain": _PCT,
+    "contrib_growth": _GROWTH_PCT,
+    "custody_fixed": _AMOUNT,
+    "market_spread": _PCT,
+    "div_yield": _PCT,
+    "extra_amount": _AMOUNT,
+    "buy_fee": _PCT,
+    "sell_fee": _PCT,
+    "entry_spread": _PCT,
+    "exit_spread": _PCT,
+    "platform_fixed": _AMOUNT,
+    "vol_annual": _PCT,
+}
+_DEBT_LIMITS = {
+    "cost": _AMOUNT,
+    "down_payment": _AMOUNT,
+    "cat_annual": _GROWTH_PCT,
+    "open_pct": _PCT,
+    "insurance_monthly": _AMOUNT,
+    "term_months": (0, MAX_TERM_MONTHS),
+    "extra_amount": _AMOUNT,
+    "inflation_annual": _GROWTH_PCT,
+}
+_INVEST_CHOICES = {
+    "instrument": ("mx_stock", "mx_debt", "usa_stock", "fund"),
+    "country": ("mx", "usa"),
+    "div_policy": ("reinvest", "withdraw"),
+    "frequency": ("monthly", "biweekly", "annual"),
+    "timing": ("begin", "end"),
+}
+
+
+class PayloadError(ValueError):
+    """Invalid request body; ``index`` is the offending scenario (if any)."""
+
+    def __init__(self, message: str, index: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.index = index
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"error": str(self)}
+        if self.index is not None:
+            out["index"] = self.index
+        return out
+
+
+def _number(name: str, value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise PayloadError(f"'{name}' debe ser numérico.")
+    if not math.isfinite(value):
+        raise PayloadError(f"'{name}' debe ser un número finito.")
+    return float(value)
+
+
+def _integer(name: str, value: Any) -> int:
+    number = _number(name, value)
+    if not number.is_integer():
+        raise PayloadError(f"'{name}' debe ser entero.")
+    return int(number)
+
+
+def _month_text(name: str, value: Any) -> str:
+    """Accept ``"6,12"`` or ``[6, 12]``; the engines parse the text."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(_integer(name, month)) for month in value)
+    raise PayloadError(f"'{name}' debe ser texto (\"6,12\") o lista de meses.")
+
+
+def _coerce(name: str, kind: str, value: Any) -> Any:
+    if kind == "float":
+        return _number(name, value)
+    if kind == "int":
+        return _integer(name, value)
+    if kind == "bool":
+        if not isinstance(value, bool):
+            raise PayloadError(f"'{name}' debe ser true o false.")
+        return value
+    if not isinstance(value, str):
+        raise PayloadError(f"'{name}' debe ser texto.")
+    return value
+
+
+def _check_range(name: str, value: Any, limits: Mapping[str, Tuple[float, float]]) -> None:
+    if name not in limits:
+        return
+    low, high = limits[name]
+    if low == -100.0 and value <= low:
+        raise PayloadError(f"'{name}' debe ser mayor que -100.")
+    if not low <= value <= high:
+        raise PayloadError(f"'{name}' debe estar entre {low:g} y {high:g}.")
+
+
+def _check_choice(name: str, value: Any) -> None:
+    allowed = _INVEST_CHOICES.get(name)
+    if allowed is not None and value not in allowed:
+        raise PayloadError(f"'{name}' debe ser uno de: {', '.join(allowed)}.")
+
+
+def _check_keys(data: Any, known: Mapping[str, str]) -> None:
+    if not isinstance(data, Mapping):
+        raise PayloadError("Cada escenario debe ser un objeto JSON.")
+    unknown = sorted(set(data) - set(known))
+    if unknown:
+        raise PayloadError(f"Campos desconocidos: {', '.join(unknown)}.")
+
+
+def inputs_from_dict(data: Mapping[str, Any]) -> Inputs:
+    """Build :class:`Inputs` from a JSON object; missing fields keep their defaults."""
+    _check_keys(data, _INVEST_TYPES)
+    values = {}
+    for name, value in data.items():
+        if name in _MONTH_FIELDS:
+            values[name] = _month_text(name, value)
+        else:
+            values[name] = _coerce(name, _INVEST_TYPES[name], value)
+            _check_range(name, values[name], _INVEST_LIMITS)
+            _check_choice(name, values[name])
+    return Inputs(**values)
+
+
+def debt_from_dict(data: Mapping[str, Any]) -> DebtInputs:
+    """Build :class:`DebtInputs` from a JSON object; ``title`` and the month
+    lists are optional, every other field is required."""
+    _check_keys(data, _DEBT_TYPES)
+    missing = [name for name in _DEBT_REQUIRED if name not in data]
+    if missing:
+        raise PayloadError(f"Faltan campos: {', '.join(missing)}.")
+    values: Dict[str, Any] = {"title": ""}
+    for name, value in data.items():
+        if name in _MONTH_FIELDS:
+            values[name] = parse_month_list(_month_text(name, value))
+        else:
+            values[name] = _coerce(name, _DEBT_TYPES[name], value)
+            _check_range(name, values[name], _DEBT_LIMITS)
+    return DebtInputs(**values)
+
+
+def check_mc_work(p: Inputs, runs: int) -> None:
+    """Reject Monte Carlo scenarios whose ``runs x years`` exceeds the budget."""
+    if runs * max(int(p.years), 1) > MAX_MC_RUN_YEARS:
+        raise PayloadError(f"Monte Carlo: corridas x años no puede pasar de {MAX_MC_RUN_YEARS:,}.")
+
+
+def _all_finite(values) -> bool:
+    return all(math.isfinite(value) for value in values)
+
+
+def check_result(result: Any) -> Any:
+    """Return ``result`` unchanged, or raise :class:`PayloadError` if any
+    figure is ``inf``/``NaN``. Accepts what the engines return (``Result``,
+    ``(rows, summary)``, ``MonteCarloResult``); exceptions pass through."""
+    if isinstance(result, Exception):
+        return result
+    if isinstance(result, Result):
+        ok = _all_finite(result[1:]) and all(_all_finite(result.rows.column(name)) for name in ROW_FIELDS)
+    elif hasattr(result, "quantiles"):
+        ok = _all_finite((result.p5, result.p50, result.p95)) and _all_finite(result.quantiles.tolist())
+    else:
+        rows, summary = result
+        ok = _all_finite(summary.values()) and all(_all_finite(row) for row in rows)
+    if not ok:
+        raise PayloadError("El escenario produce valores fuera de rango; revisa tasas y montos.")
+    return result
+
+
+def scenarios_from_body(body: Any, limit: int = MAX_SCENARIOS) -> Tuple[List[Any], Dict[str, Any]]:
+    """Split a request body into ``(scenarios, options)``.
+
+    The body is either a bare list of scenarios or an object
+    ``{"scenarios": [...], <options>}``.
+    """
+    if isinstance(body, list):
+        scenarios, options = body, {}
+    elif isinstance(body, Mapping) and isinstance(body.get("scenarios"), list):
+        scenarios = body["scenarios"]
+        options = {key: value for key, value in body.items() if key != "scenarios"}
+    else:
+        raise PayloadError('El cuerpo debe ser una lista de escenarios o {"scenarios": [...]}.')
+    if not scenarios:
+        raise PayloadError("No hay escenarios que simular.")
+    if len(scenarios) > limit:
+        raise PayloadError(f"Máximo {limit} escenarios por petición.")
+    return scenarios, options
+
+
+def parse_each(scenarios: Sequence[Any], parse) -> List[Any]:
+    """Apply ``parse`` to every scenario, tagging errors with their index."""
+    out = []
+    for index, item in enumerate(scenarios):
+        try:
+            out.append(parse(item))
+        except PayloadError as exc:
+            raise PayloadError(str(exc), index) from None
+    return out
+
+
+def option(options: Mapping[str, Any], name: str, kind: str, default: Any) -> Any:
+    """Typed request-level option (``"bool"``, ``"int"``, ``"float"``); ``None`` means default."""
+    value = options.get(name)
+    return default if value is None else _coerce(name, kind, value)
+
+
+def result_to_dict(result: Result) -> Dict[str, Any]:
+    rows = result.rows
+    out: Dict[str, Any] = {
+        "nominal": result.nominal,
+        "total_contrib": result.total_contrib,
+        "total_gain": result.total_gain,
+        "real_total": result.real_total,
+    }
+    if len(rows):
+        out["rows"] = {name: rows.column(name).tolist() for name in ROW_FIELDS}
+    return out
+
+
+def debt_to_dict(rows: Sequence[tuple], summary: Mapping[str, float]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"summary": dict(summary)}
+    if rows:
+        out["schedule"] = {name: list(column) for name, column in zip(DEBT_COLUMNS, zip(*rows))}
+    return out
+
+
+def mc_to_dict(result) -> Dict[str, Any]:
+    return {
+        "p5": float(result.p5),
+        "p50": float(result.p50),
+        "p95": float(result.p95),
+        "runs": result.runs,
+        "percentiles": result.percentiles.tolist(),
+        "quantiles": result.quantiles.tolist(),
+    }
+
+
+__all__ = [
+    "PayloadError",
+    "MAX_SCENARIOS",
+    "MAX_YEARS",
+    "MAX_TERM_MONTHS",
+    "MAX_MC_RUN_YEARS",
+    "MAX_RATE_PCT",
+    "MAX_AMOUNT",
+    "check_mc_work",
+    "check_result",
+    "inputs_from_dict",
+    "debt_from_dict",
+    "scenarios_from_body",
+    "parse_each",
+    "option",
+    "result_to_dict",
+    "debt_to_dict",
+    "mc_to_dict",
+]
@@ -0,0 +1,185 @@
+"""
+quantiles.py
+------------
+Estimadores de cuantiles para los valores finales de Monte Carlo.
+
+- :class:`ExactQuantiles`: guarda todos los valores y ordena al final.
+  Memoria O(n); es el modo por defecto para corridas pequeñas.
+- :class:`LogHistogramSketch`: histograma de cubetas logarítmicas (estilo
+  DDSketch). Memoria acotada por el rango dinámico de los datos, no por ``n``,
+  y se puede combinar (``merge``) entre shards o procesos.
+
+Ambos usan la misma convención de rango que la UI original: el cuantil ``q``
+es el elemento de posición ``round(q * (n - 1))`` de los valores ordenados.
+
+Garantía del sketch: para todo ``q`` el valor devuelto ``v`` cumple
+``|v - x| <= alpha * |x|``, donde ``x`` es el cuantil exacto con esa misma
+convención. Valores con ``|x| < min_value`` se agrupan en una cubeta de cero y
+se devuelven como ``0.0`` (error absoluto ``< min_value``). ``inf`` y ``NaN``
+no tienen cubeta: :meth:`LogHistogramSketch.add` los rechaza con
+``ValueError`` en lugar de descartarlos y mover los rangos. El número de
+cubetas es a lo más ``ln(max|x| / min_value) / ln(gamma)`` por signo, con
+``gamma = (1 + alpha) / (1 - alpha)``: unas 3,200 para ``alpha=0.005`` y
+valores entre 0.01 y 1e12.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import List, Optional
+
+from backend.core._np import np, require_numpy
+
+# Por encima de este número de valores el modo "auto" usa el sketch.
+EXACT_MAX_VALUES = 1_000_000
+
+
+def nearest_rank(sorted_values, pct: float) -> float:
+    """Nearest-rank quantile, same rule the legacy UI used (``round(pct * (n - 1))``)."""
+    n = len(sorted_values)
+    if not n:
+        return 0.0
+    k = max(0, min(n - 1, int(round(pct * (n - 1)))))
+    return float(sorted_values[k])
+
+
+class ExactQuantiles:
+    """Collect every value; quantiles are exact."""
+
+    def __init__(self) -> None:
+        self._parts: List[np.ndarray] = []
+        self._sorted: Optional[np.ndarray] = None
+
+    @property
+    def count(self) -> int:
+        return sum(len(part) for part in self._parts)
+
+    def add(self, values) -> None:
+        self._parts.append(np.asarray(values, dtype=float).ravel())
+        self._sorted = None
+
+    def merge(self, other: "ExactQuantiles") -> None:
+        self._parts.extend(other._parts)
+        self._sorted = None
+
+    def quantile(self, pct: float) -> float:
+        if self._sorted is None:
+            self._sorted = np.sort(np.concatenate(self._parts)) if self._parts else np.empty(0)
+        return nearest_rank(self._sorted, pct)
+
+
+class _Store:
+    """Dense counts for consecutive integer bucket keys, grown on demand."""
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def add_keys(self, keys) -> None:
+        if not len(keys):
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        self._extend(lo, hi)
+        self.counts += np.bincount(keys - self.offset, minlength=len(self.counts))
+
+    def add_counts(self, other: "_Store") -> None:
+        if not len(other.counts):
+            return
+        self._extend(other.offset, other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        self.counts[start:start + len(other.counts)] += other.counts
+
+    def _extend(self, lo: int, hi: int) -> None:
+        if not len(self.counts):
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + len(self.counts) - 1)
+        if new_lo == self.offset and new_hi == self.offset + len(self.counts) - 1:
+            return
+        grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+        grown[self.offset - new_lo:self.offset - new_lo + len(self.counts)] = self.counts
+        self.offset, self.counts = new_lo, grown
+
+    def key_at_rank(self, rank: int, from_top: bool = False) -> int:
+        cum = np.cumsum(self.counts[::-1] if from_top else self.counts)
+        i = int(np.searchsorted(cum, rank, side="right"))
+        return self.offset + (len(self.counts) - 1 - i if from_top else i)
+
+
+class LogHistogramSketch:
+    """Mergeable log-bucket histogram with relative error ``alpha`` (see module docstring)."""
+
+    def __init__(self, alpha: float = 0.005, min_value: float = 1e-2) -> None:
+        if not 0.0 < alpha < 1.0:
+            raise ValueError("alpha debe estar entre 0 y 1.")
+        self.alpha = alpha
+        self.min_value = min_value
+        self.gamma = (1.0 + alpha) / (1.0 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self._pos = _Store()
+        self._neg = _Store()
+        self._zero = 0
+
+    @property
+    def count(self) -> int:
+        return self._neg.total + self._zero + self._pos.total
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def add(self, values) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        if not np.isfinite(values).all():
+            raise ValueError("El sketch de cuantiles solo acepta valores finitos (hay inf o NaN).")
+        pos = values[values >= self.min_value]
+        neg = -values[values <= -self.min_value]
+        self._zero += len(values) - len(pos) - len(neg)
+        self._pos.add_keys(self._keys(pos))
+        self._neg.add_keys(self._keys(neg))
+
+    def merge(self, other: "LogHistogramSketch") -> None:
+        if other.gamma != self.gamma or other.min_value != self.min_value:
+            raise ValueError("Solo se pueden combinar sketches con el mismo alpha y min_value.")
+        self._pos.add_counts(other._pos)
+        self._neg.add_counts(other._neg)
+        self._zero += other._zero
+
+    def _value(self, key: int) -> float:
+        # Punto medio relativo de (gamma^(k-1), gamma^k]: error <= alpha.
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    def quantile(self, pct: float) -> float:
+        n = self.count
+        if not n:
+            return 0.0
+        rank = max(0, min(n - 1, int(round(pct * (n - 1)))))
+        n_neg = self._neg.total
+        if rank < n_neg:
+            # Los negativos más grandes en magnitud van primero.
+            return -self._value(self._neg.key_at_rank(rank, from_top=True))
+        rank -= n_neg
+        if rank < self._zero:
+            return 0.0
+        return self._value(self._pos.key_at_rank(rank - self._zero))
+
+
+def make_estimator(kind: str = "auto", expected: int = 0):
+    """Build an estimator: ``"exact"``, ``"sketch"`` or ``"auto"`` (exact up to
+    :data:`EXACT_MAX_VALUES` expected values, sketch beyond)."""
+    require_numpy("los estimadores de cuantiles")
+    if kind == "auto":
+        kind = "exact" if expected <= EXACT_MAX_VALUES else "sketch"
+    if kind == "exact":
+        return ExactQuantiles()
+    if kind == "sketch":
+        return LogHistogramSketch()
+    raise ValueError(f"Estimador de cuantiles desconocido: {kind!r}")
+
+
+__all__ = ["ExactQuantiles", "LogHistogramSketch", "make_estimator", "nearest_rank", "EXACT_MAX_VALUES"]
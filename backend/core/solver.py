@@ -0,0 +1,281 @@
+"""
+solver.py
+---------
+Búsqueda de metas sobre el motor de inversión.
+
+Responde preguntas como "¿qué aporte mensual llega a MX$1M reales en 20
+años con estas comisiones?": encuentra ``monthly``, ``years`` o
+``annual_return`` tales que el valor final nominal o real alcance una meta.
+
+El valor final es monótono creciente en las tres variables, así que basta
+acotar la raíz (duplicando el extremo superior) y afinarla con el método de
+Brent (bisección + secante + interpolación inversa cuadrática). Cada
+evaluación usa :func:`backend.core.invest_calc.simulate` en modo solo resumen,
+que a su vez usa la forma cerrada cuando el calendario es regular.
+
+Para créditos (:mod:`backend.core.calc`):
+
+- :func:`min_extra_payment`: pago extra mínimo en ``extra_months`` para
+  liquidar a más tardar en el mes N.
+- :func:`term_for_payment`: plazo más corto cuya mensualidad (con seguro) no
+  rebasa un tope; sale directo de la fórmula de anualidad.
+- :func:`effective_cat`: CAT efectivo anual incluyendo comisión de apertura y
+  seguro, como TIR de los flujos del crédito.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import replace
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from backend.core.calc import DebtInputs, monthly_rate, simulate_debt
+from backend.core.invest_calc import Inputs, simulate
+
+VARIABLES = ("monthly", "years", "annual_return")
+MEASURES = ("nominal", "real")
+
+# Intervalo inicial y límite de búsqueda por variable.
+_BOUNDS = {
+    "monthly": (0.0, 1_000.0, 1e12),
+    "years": (1, 10, 200),
+    "annual_return": (-99.0, 10.0, 1_000.0),
+}
+
+
+class SolveResult(NamedTuple):
+    """Solution of :func:`solve`."""
+
+    value: float        # valor encontrado de la variable (int para ``years``)
+    achieved: float     # valor final (nominal o real) con esa solución
+    evaluations: int    # llamadas al motor
+    converged: bool
+
+
+def final_value(p: Inputs, measure: str = "real") -> float:
+    """Nominal or real final value of ``p`` (summary-only engine run)."""
+    result = simulate(p, rows=False)
+    return result.real_total if measure == "real" else result.nominal
+
+
+def _brent(f: Callable[[float], float], a: float, b: float, fa: float, fb: float,
+           xtol: float, ftol: float, max_iter: int) -> Tuple[float, float, bool]:
+    """Brent-Dekker root finder on a bracket ``f(a) * f(b) <= 0``."""
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2.0 * 2.2e-16 * abs(b) + 0.5 * xtol
+        m = 0.5 * (c - b)
+        if abs(m) <= tol or abs(fb) <= ftol:
+            return b, fb, True
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2.0 * m * s, 1.0 - s                      # secante
+            else:
+                q, r = fa / fc, fb / fc                          # interpolación inversa cuadrática
+                p = s * (2.0 * m * q * (q - r) - (b - a) * (r - 1.0))
+                q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2.0 * p < min(3.0 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m                                            # bisección
+        a, fa = b, fb
+        b += d if abs(d) > tol else (tol if m > 0 else -tol)
+        fb = f(b)
+    return b, fb, False
+
+
+def solve(
+    p: Inputs,
+    target: float,
+    variable: str = "monthly",
+    measure: str = "real",
+    lo: Optional[float] = None,
+    hi: Optional[float] = None,
+    xtol: float = 1e-6,
+    max_evals: int = 100,
+) -> SolveResult:
+    """Find ``variable`` so that the final ``measure`` value of ``p`` reaches ``target``.
+
+    ``monthly`` and ``annual_return`` are solved to ``xtol``; ``years`` returns
+    the smallest whole number of years that reaches the target. ``lo``/``hi``
+    override the initial bracket; ``hi`` is doubled until the target is
+    bracketed. Raises ``ValueError`` when the target is out of reach.
+    """
+    if variable not in VARIABLES:
+        raise ValueError(f"Variable desconocida: {variable!r} (usa {', '.join(VARIABLES)}).")
+    if measure not in MEASURES:
+        raise ValueError(f"Medida desconocida: {measure!r} (usa {', '.join(MEASURES)}).")
+    default_lo, default_hi, limit = _BOUNDS[variable]
+    lo = default_lo if lo is None else lo
+    hi = default_hi if hi is None else hi
+    evals = 0
+
+    def f(x) -> float:
+        nonlocal evals
+        evals += 1
+        return final_value(replace(p, **{variable: x}), measure) - target
+
+    if variable == "years":
+        return _solve_years(f, int(lo), int(hi), int(limit), target, lambda: evals)
+
+    f_lo = f(lo)
+    if f_lo >= 0:
+        return SolveResult(lo, f_lo + target, evals, True)
+    f_hi = f(hi)
+    while f_hi < 0:
+        if hi >= limit:
+            raise ValueError("La meta no se alcanza dentro del rango de búsqueda.")
+        lo, f_lo = hi, f_hi
+        hi = min(limit, hi * 2.0 if hi > 0 else 1.0)
+        f_hi = f(hi)
+    ftol = 1e-12 * max(1.0, abs(target))
+    root, f_root, converged = _brent(f, lo, hi, f_lo, f_hi, xtol, ftol, max(1, max_evals - evals))
+    return SolveResult(root, f_root + target, evals, converged)
+
+
+def _solve_years(f, lo: int, hi: int, limit: int, target: float, evals) -> SolveResult:
+    """Smallest integer ``x`` in ``[lo, limit]`` with ``f(x) >= 0`` (f non-decreasing)."""
+    lo = max(1, lo)
+    f_lo = f(lo)
+    if f_lo >= 0:
+        return SolveResult(lo, f_lo + target, evals(), True)
+    hi = max(hi, lo + 1)
+    f_hi = f(hi)
+    while f_hi < 0:
+        if hi >= limit:
+            raise ValueError("La meta no se alcanza dentro del rango de búsqueda.")
+        lo, hi = hi, min(limit, hi * 2)
+        f_hi = f(hi)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        f_mid = f(mid)
+        if f_mid >= 0:
+            hi, f_hi = mid, f_mid
+        else:
+            lo = mid
+    return SolveResult(hi, f_hi + target, evals(), True)
+
+
+def required_monthly(p: Inputs, target: float, measure: str = "real") -> SolveResult:
+    """Monthly contribution that reaches ``target`` in ``p.years`` years."""
+    return solve(p, target, "monthly", measure)
+
+
+# --------------------------------------------------------------------------- créditos
+
+def min_extra_payment(data: DebtInputs, by_month: int, tol: float = 0.01) -> SolveResult:
+    """Smallest ``extra_amount`` (paid in ``data.extra_months``) that liquidates
+    the credit within ``by_month`` months, to ``tol`` pesos.
+
+    Months to payoff never increase with the extra amount, so a bisection on
+    ``[0, principal]`` suffices. ``achieved`` is the resulting number of months.
+    Raises ``ValueError`` when no extra amount can make it (e.g. no
+    ``extra_months`` before ``by_month``).
+    """
+    principal = data.cost - data.down_payment
+    evals = 0
+
+    def months(extra: float) -> int:
+        nonlocal evals
+        evals += 1
+        return simulate_debt(replace(data, extra_amount=extra), rows=False)[1]["months"]
+
+    m = months(0.0)
+    if m <= by_month:
+        return SolveResult(0.0, m, evals, True)
+    if not data.extra_months or months(principal) > by_month:
+        raise ValueError("Ningún pago extra liquida el crédito en ese plazo.")
+    lo, hi = 0.0, principal
+    while hi - lo > tol:
+        mid = 0.5 * (lo + hi)
+        if months(mid) <= by_month:
+            hi = mid
+        else:
+            lo = mid
+    return SolveResult(hi, months(hi), evals, True)
+
+
+def term_for_payment(data: DebtInputs, max_payment: float) -> SolveResult:
+    """Shortest ``term_months`` whose monthly outlay (annuity + insurance) is at
+    most ``max_payment``. ``achieved`` is that outlay.
+
+    Solves ``r P / (1 - (1 + r)^-n) <= X`` for ``n`` directly:
+    ``n = -log(1 - r P / X) / log(1 + r)`` (``P / X`` without interest).
+    """
+    principal = data.cost - data.down_payment
+    if principal <= 0:
+        raise ValueError("Necesitas que el monto financiado sea positivo.")
+    rate = monthly_rate(data.cat_annual)
+    budget = max_payment - data.insurance_monthly
+    if budget <= 0 or (rate > 0 and budget <= rate * principal):
+        raise ValueError("La mensualidad máxima no alcanza a cubrir los intereses.")
+    if rate > 0:
+        term = math.ceil(-math.log1p(-rate * principal / budget) / math.log1p(rate) - 1e-9)
+    else:
+        term = math.ceil(principal / budget - 1e-9)
+    term = max(1, term)
+    payment = rate * principal / (1.0 - (1.0 + rate) ** (-term)) if rate > 0 else principal / term
+    return SolveResult(term, payment + data.insurance_monthly, 0, True)
+
+
+def effective_cat(data: DebtInputs, tol: float = 1e-12) -> float:
+    """Effective annual cost (%) including opening fee and insurance.
+
+    The monthly IRR ``i`` solves ``principal = sum_k (payment_k + fees_k) /
+    (1 + i)^k`` over the schedule of :func:`simulate_debt`; the result is
+    ``(1 + i)^12 - 1`` in percent.
+    """
+    rows, _summary = simulate_debt(data)
+    principal = data.cost - data.down_payment
+    flows = [payment + fees for _m, payment, _i, _p, fees, _b, _acc, _real in rows]
+
+    def npv(i: float) -> float:
+        v = 1.0 / (1.0 + i)
+        total, disc = 0.0, 1.0
+        for flow in flows:
+            disc *= v
+            total += flow * disc
+        return principal - total
+
+    lo, hi = 0.0, 0.01
+    f_lo, f_hi = npv(lo), npv(hi)
+    if f_lo > 0:
+        # Se paga menos de lo recibido: TIR negativa.
+        lo, hi, f_lo, f_hi = -0.01, lo, npv(-0.01), f_lo
+        while f_lo > 0 and lo > -0.99:
+            lo = max(-0.99, lo * 2.0)
+            f_lo = npv(lo)
+    else:
+        while f_hi < 0 and hi < 10.0:
+            hi *= 2.0
+            f_hi = npv(hi)
+    if (f_lo > 0) == (f_hi > 0):
+        raise ValueError("No se pudo acotar el CAT efectivo.")
+    i, _f, _ok = _brent(npv, lo, hi, f_lo, f_hi, tol, 1e-9 * principal, 200)
+    return ((1.0 + i) ** 12 - 1.0) * 100.0
+
+
+__all__ = [
+    "SolveResult",
+    "solve",
+    "required_monthly",
+    "final_value",
+    "min_extra_payment",
+    "term_for_payment",
+    "effective_cat",
+    "VARIABLES",
+    "MEASURES",
+]
@@ -0,0 +1,89 @@
+"""
+database.py
+-----------
+Configuración de la base de datos de la API, por variables de entorno.
+
+- ``DATABASE_URL``: por defecto SQLite (``sqlite:///data.db``, en la carpeta
+  ``instance/`` de Flask). Con ``postgresql://...`` (o el ``postgres://`` que
+  entregan algunos hostings) se usa PostgreSQL; requiere un driver como
+  ``psycopg2-binary``.
+- Pool: ``DB_POOL_SIZE`` (5), ``DB_MAX_OVERFLOW`` (10), ``DB_POOL_TIMEOUT``
+  (30 s) y ``DB_POOL_RECYCLE`` (1800 s); siempre con ``pool_pre_ping`` para
+  descartar conexiones que el servidor cerró.
+- SQLite: cada conexión nueva recibe ``journal_mode=WAL`` (los lectores ya no
+  se bloquean mientras alguien escribe), ``synchronous=NORMAL`` (seguro con
+  WAL y sin un fsync por transacción) y ``busy_timeout`` (espera el candado de
+  escritura en lugar de fallar con "database is locked"). Se ajustan con
+  ``SQLITE_JOURNAL_MODE``, ``SQLITE_SYNCHRONOUS`` y ``SQLITE_BUSY_TIMEOUT_MS``.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Mapping
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+DEFAULT_URL = "sqlite:///data.db"
+
+_JOURNAL_MODES = ("WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF")
+_SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def _int(env: Mapping[str, str], name: str, default: int) -> int:
+    value = env.get(name)
+    return default if value in (None, "") else int(value)
+
+
+def _choice(env: Mapping[str, str], name: str, default: str, allowed) -> str:
+    value = (env.get(name) or default).upper()
+    if value not in allowed:
+        raise ValueError(f"{name} debe ser uno de: {', '.join(allowed)}.")
+    return value
+
+
+def database_url(env: Mapping[str, str] = os.environ) -> str:
+    url = env.get("DATABASE_URL") or DEFAULT_URL
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, env: Mapping[str, str] = os.environ) -> Dict[str, Any]:
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for ``url``."""
+    if _is_sqlite_memory(url):
+        return {}  # una sola conexión compartida; no hay pool que ajustar
+    return {
+        "pool_size": _int(env, "DB_POOL_SIZE", 5),
+        "max_overflow": _int(env, "DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _int(env, "DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _int(env, "DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+
+
+def configure_engine(engine: Engine, env: Mapping[str, str] = os.environ) -> None:
+    """Install the SQLite pragmas on every new connection (no-op elsewhere)."""
+    if engine.dialect.name != "sqlite":
+        return
+    journal = _choice(env, "SQLITE_JOURNAL_MODE", "WAL", _JOURNAL_MODES)
+    synchronous = _choice(env, "SQLITE_SYNCHRONOUS", "NORMAL", _SYNCHRONOUS)
+    busy_ms = _int(env, "SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {busy_ms}")
+        if not _is_sqlite_memory(str(engine.url)):
+            cursor.execute(f"PRAGMA journal_mode = {journal}")
+        cursor.execute(f"PRAGMA synchronous = {synchronous}")
+        cursor.close()
+
+
+__all__ = ["DEFAULT_URL", "database_url", "engine_options", "configure_engine"]
@@ -0,0 +1,91 @@
+"""
+security.py
+-----------
+Contraseñas con bcrypt (Flask-Bcrypt) para la API.
+
+- El costo sale de ``BCRYPT_LOG_ROUNDS`` (config de Flask o variable de
+  entorno; 12 por defecto) y se lee en cada hash con :func:`rounds`, así que
+  cambiarlo en ``app.config`` aplica de inmediato. Cada punto más duplica el
+  tiempo de cada login.
+- ``BCRYPT_HANDLE_LONG_PASSWORDS`` queda activo: Flask-Bcrypt pasa *toda*
+  contraseña por SHA-256 (64 caracteres hex) antes de bcrypt, así que no hay
+  tope de 72 bytes. Los hashes guardados dependen de ese paso; no se puede
+  apagar sin invalidar las cuentas existentes.
+- El hash y la verificación corren en un pool de hilos acotado
+  (``BCRYPT_WORKERS``, por defecto un hilo por CPU). Es un tope de
+  concurrencia, no una vía asíncrona: el hilo de la petición sigue esperando
+  el resultado. bcrypt libera el GIL, así que los logins concurrentes usan
+  todos los núcleos, pero nunca hay más hashes a la vez que hilos en el pool
+  y el resto de las peticiones no se queda sin CPU.
+- Migración transparente: al iniciar sesión, una contraseña guardada en texto
+  plano (usuarios anteriores) o con un costo distinto del configurado se
+  vuelve a guardar con el hash actual.
+- Un correo desconocido se verifica contra un hash de relleno del mismo costo,
+  para que el tiempo de respuesta no revele qué cuentas existen.
+
+No hay caché de verificaciones: guardar "esta contraseña ya fue válida"
+equivaldría a guardar la contraseña. El costo se ajusta con el número de
+rondas, no saltándose bcrypt.
+"""
+
+from __future__ import annotations
+
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from flask import current_app
+from flask_bcrypt import Bcrypt
+
+DEFAULT_ROUNDS = 12
+
+bcrypt = Bcrypt()
+WORKERS = int(os.environ.get("BCRYPT_WORKERS", 0)) or os.cpu_count() or 2
+_pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="bcrypt")
+
+
+def init_app(app) -> None:
+    app.config.setdefault("BCRYPT_LOG_ROUNDS", int(os.environ.get("BCRYPT_LOG_ROUNDS", DEFAULT_ROUNDS)))
+    # Pre-hash SHA-256 de todas las contraseñas (sin tope de 72 bytes); ver arriba.
+    app.config.setdefault("BCRYPT_HANDLE_LONG_PASSWORDS", True)
+    bcrypt.init_app(app)
+
+
+def rounds() -> int:
+    """Configured cost of the current app (needs an app context)."""
+    return int(current_app.config["BCRYPT_LOG_ROUNDS"])
+
+
+def hash_rounds(stored: str) -> Optional[int]:
+    """Cost of a ``$2b$12$...`` hash; ``None`` for legacy plaintext."""
+    if len(stored) == 60 and stored.startswith(("$2a$", "$2b$", "$2y$")) and stored[4:6].isdigit():
+        return int(stored[4:6])
+    return None
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash at the configured cost (needs an app context)."""
+    return _pool.submit(bcrypt.generate_password_hash, password, rounds()).result().decode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _dummy_hash(cost: int) -> str:
+    return bcrypt.generate_password_hash("dummy-password", rounds=cost).decode("utf-8")
+
+
+def verify_password(stored: Optional[str], password: str) -> Tuple[bool, bool]:
+    """``(valid, needs_rehash)`` for a stored value (``None``: unknown user)."""
+    if stored is None:
+        _pool.submit(bcrypt.check_password_hash, _dummy_hash(rounds()), password).result()
+        return False, False
+    cost = hash_rounds(stored)
+    if cost is None:
+        valid = hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+        return valid, valid
+    valid = _pool.submit(bcrypt.check_password_hash, stored, password).result()
+    return valid, valid and cost != rounds()
+
+
+__all__ = ["bcrypt", "init_app", "rounds", "hash_rounds", "hash_password", "verify_password", "DEFAULT_ROUNDS", "WORKERS"]
@@ -1,9 +1,25 @@
-"""Placeholder for the investment evolution table component."""
+"""
+evolution_table.py
+------------------
+Tabla de evolución (año a año o mes a mes) con desplazamiento virtual, y
+:func:`sync_rows` para actualizar por diferencias un ``Treeview`` común.
+
+El ``Treeview`` solo contiene tantos renglones como caben en pantalla. Los
+datos crudos se guardan aparte y, al desplazar o recalcular, se formatean
+únicamente las filas visibles; cada renglón se reescribe en su lugar
+(``item(iid, values=...)``) y solo si alguno de sus textos cambió. Así, un calendario de
+600 meses cuesta lo mismo que uno de 12.
+
+``sync_rows`` sirve a las tablas que sí muestran todas sus filas: cada fila
+conserva un ``iid`` persistente (año o mes), solo se reescriben las celdas que
+cambiaron y las filas sobrantes se eliminan.
+"""
 
 from __future__ import annotations
 
 import tkinter as tk
 from tkinter import ttk
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:
     import ttkbootstrap as tb  # type: ignore
@@ -12,19 +28,186 @@ try:
 except Exception:  # pragma: no cover
     FrameBase = ttk.Frame  # type: ignore
 
+Formatter = Callable[[object], str]
+
+
+def _write_cells(tree: ttk.Treeview, iid: str, old: Optional[tuple], values: tuple) -> None:
+    """Rewrite only the cells of ``iid`` whose text differs from ``old``."""
+    if old is None or len(old) != len(values):
+        tree.item(iid, values=values)
+        return
+    changed = [i for i, (before, after) in enumerate(zip(old, values)) if before != after]
+    if len(changed) == len(values):
+        tree.item(iid, values=values)  # una sola llamada a Tcl
+        return
+    for i in changed:
+        tree.set(iid, i, values[i])
+
+
+def sync_rows(tree: ttk.Treeview, rows: Iterable[Tuple[str, tuple]], shown: Dict[str, tuple]) -> None:
+    """Diff ``rows`` (``(iid, values)`` in display order) into ``tree``.
+
+    ``shown`` is the caller-owned ``iid -> values`` map of what the tree
+    currently displays; it is updated in place. New keys are inserted at their
+    position, changed cells are rewritten and keys no longer present are
+    deleted. Reset ``shown`` whenever the tree itself is rebuilt.
+    """
+    keep = set()
+    for index, (iid, values) in enumerate(rows):
+        keep.add(iid)
+        old = shown.get(iid)
+        if old is None:
+            tree.insert("", index, iid=iid, values=values)
+        elif old != values:
+            _write_cells(tree, iid, old, values)
+        shown[iid] = values
+    stale = [iid for iid in shown if iid not in keep]
+    if stale:
+        tree.delete(*stale)
+        for iid in stale:
+            del shown[iid]
+
 
 class EvolutionTable:
-    """Table that will list year-by-year investment results."""
+    """Virtual table: only rows inside the viewport are formatted and shown.
+
+    ``columns`` is a sequence of ``(key, heading)``; ``formatters`` maps a key
+    to a callable that turns the raw cell into text (``str`` by default).
+    Call :meth:`set_rows` with any sequence of row sequences; the table keeps a
+    reference, not a copy.
+    """
 
-    def __init__(self, parent: tk.Misc) -> None:
+    def __init__(
+        self,
+        parent: tk.Misc,
+        columns: Sequence[Tuple[str, str]],
+        formatters: Optional[Dict[str, Formatter]] = None,
+        widths: Optional[Dict[str, int]] = None,
+        anchors: Optional[Dict[str, str]] = None,
+        height: int = 12,
+    ) -> None:
         self.frame = FrameBase(parent)
-        # TODO: montar Treeview con columnas: Año, Saldo final, Aporte acumulado, Ganancia, Valor real, Comisiones, Impuestos
-        # TODO: aplicar estilo zebra rows y header con fondo gris claro
-        # TODO: integrar scrollbars vertical/horizontal con estilo consistente
-        # TODO: mostrar totales resumidos en un footer opcional
+        self.keys = [key for key, _heading in columns]
+        formatters = formatters or {}
+        self._formatters: List[Formatter] = [formatters.get(key, str) for key in self.keys]
+        self._rows: Sequence[Sequence] = ()
+        self._offset = 0
+        self._shown: List[Optional[tuple]] = []
+        self._row_height = 20
+
+        self.tree = ttk.Treeview(self.frame, columns=self.keys, show="headings", height=height)
+        for key, heading in columns:
+            self.tree.heading(key, text=heading)
+            self.tree.column(
+                key,
+                width=(widths or {}).get(key, 120),
+                anchor=(anchors or {}).get(key, "e"),
+            )
+        self.tree.tag_configure("odd", background="#f5f5f5")
+        self.vsb = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.hsb = ttk.Scrollbar(self.frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.hsb.grid(row=1, column=0, sticky="ew")
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        try:
+            self._row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            pass
+        self._resize_pool(height)
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda _e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda _e: self.scroll(3))
 
     def get_frame(self) -> tk.Misc:
         return self.frame
 
+    # ------------------------------------------------------------------ datos
+    def set_rows(self, rows: Sequence[Sequence]) -> None:
+        """Replace the data; only the visible window is re-rendered."""
+        self._rows = rows
+        self._offset = max(0, min(self._offset, self._max_offset()))
+        self._render()
+
+    def update_row(self, index: int, row: Sequence) -> None:
+        """Replace one row (``rows`` must be a mutable sequence)."""
+        self._rows[index] = row  # type: ignore[index]
+        if self._offset <= index < self._offset + len(self._shown):
+            self._render()
+
+    def clear(self) -> None:
+        self.set_rows(())
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------ desplazamiento
+    def scroll(self, delta: int) -> None:
+        self.scroll_to(self._offset + delta)
+
+    def scroll_to(self, index: int) -> None:
+        offset = max(0, min(int(index), self._max_offset()))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _max_offset(self) -> int:
+        return max(0, len(self._rows) - len(self._shown))
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self._rows)))
+        elif action == "scroll":
+            step = len(self._shown) if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def _on_wheel(self, event) -> str:
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_configure(self, event) -> None:
+        # El encabezado ocupa aproximadamente un renglón.
+        visible = max(1, event.height // self._row_height - 1)
+        if visible != len(self._shown):
+            self._resize_pool(visible)
+            self._offset = max(0, min(self._offset, self._max_offset()))
+            self._render()
+
+    # ---------------------------------------------------------------- render
+    def _resize_pool(self, size: int) -> None:
+        current = len(self._shown)
+        for slot in range(current, size):
+            self.tree.insert("", "end", iid=f"r{slot}")
+        if size < current:
+            self.tree.delete(*(f"r{slot}" for slot in range(size, current)))
+        self._shown = self._shown[:size] + [None] * max(0, size - current)
+
+    def _render(self) -> None:
+        total = len(self._rows)
+        formatters = self._formatters
+        for slot in range(len(self._shown)):
+            index = self._offset + slot
+            iid = f"r{slot}"
+            if index < total:
+                values = tuple(fmt(cell) for fmt, cell in zip(formatters, self._rows[index]))
+                tags = ("odd",) if index % 2 else ()
+            else:
+                values, tags = ("",) * len(formatters), ()
+            old = self._shown[slot]
+            if old is None or old[1] != tags:
+                self.tree.item(iid, values=values, tags=tags)
+            elif old[0] != values:
+                _write_cells(self.tree, iid, old[0], values)
+            self._shown[slot] = (values, tags)
+        if total:
+            first = self._offset / total
+            self.vsb.set(first, min(1.0, first + len(self._shown) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
+
 
-__all__ = ["EvolutionTable"]
+__all__ = ["EvolutionTable", "sync_rows"]
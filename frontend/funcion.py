@@ -54,10 +54,25 @@ import locale
 import sys
 import ast
 
-from dataclasses import dataclass, field
-
 from functools import partial
 
+# --- parche de path para poder importar "backend" como paquete ---
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# -----------------------------------------------------------------
+
+from backend.core.cache import cached_simulate, cached_simulate_debt, cached_simulate_mc
+from backend.core.calc import DebtError, DebtInputs, DebtRow, parse_month_list
+from backend.core.invest_calc import Inputs, YearTable
+from frontend.components.evolution_table import EvolutionTable, sync_rows
+from frontend.recalc import RecalcGraph, RecalcScheduler
+
+# Tope de trayectorias Monte Carlo por recálculo en la UI
+MC_MAX_RUNS = 200_000
+
 # ===== Theme bootstrap (opcional) =====
 
 BOOT = None
@@ -832,73 +847,6 @@ def fmt_currency(value: float, symbol: str = "MX$") -> str:
     except Exception:
         return f"{symbol} {value:.2f}"
 
-@dataclass
-
-class Inputs:
-
-    initial: float = 0.0
-    monthly: float = 0.0
-    years: int = 1
-    annual_return: float = 10.0     # %
-    inflation: float = 4.0          # %
-    # Fricción e impuestos
-    fee_deposit: float = 0.0        # %
-    buy_sell: float = 0.0           # %
-    mgmt: float = 0.0               # %
-    vat_on_fees: float = 16.0       # %
-    tax_gain: float = 10.0          # %
-    contrib_growth: float = 0.0     # % anual
-    custody_fixed: float = 0.0      # MXN/mes
-    market_spread: float = 0.0      # % aplicado al final
-    # Perfil fiscal / instrumento
-    instrument: str = "mx_stock"      # mx_stock | mx_debt | usa_stock | fund
-    country: str = "mx"               # mx | usa
-    w8ben: bool = True
-    div_yield: float = 0.0            # % anual
-    div_policy: str = "reinvest"      # reinvest | withdraw
-    # Calendario de aportes
-    frequency: str = "monthly"        # monthly | biweekly | annual
-    timing: str = "begin"             # begin | end
-    extra_months: str = ""            # "6,12"
-    extra_amount: float = 0.0
-    skip_months: str = ""             # "7,8"
-    # Costos avanzados
-    buy_fee: float = 0.0              # %
-    sell_fee: float = 0.0             # %
-    entry_spread: float = 0.0         # %
-    exit_spread: float = 0.0          # %
-    platform_fixed: float = 0.0       # MXN/mes
-    # Riesgo
-    vol_annual: float = 0.0           # %
-    mc_runs: int = 0                  # 0 = sin MC
-
-@dataclass
-
-class YearRow:
-
-    year: int
-    final_balance: float
-    cum_contrib: float
-    gain: float
-    real_value: float
-    fees: float
-    taxes: float
-
-@dataclass
-class DebtInputs:
-
-    title: str
-    cost: float
-    down_payment: float
-    cat_annual: float
-    open_pct: float
-    insurance_monthly: float
-    term_months: int
-    extra_months: set[int]
-    extra_amount: float
-    skip_months: set[int]
-    inflation_annual: float
-
 class App(tk.Tk):
 
     def __init__(self):
@@ -941,6 +889,15 @@ class App(tk.Tk):
         self.debt_extra_amount = tk.StringVar(value="0")
         self.debt_skip_months = tk.StringVar(value="")
         self.debt_inflation = tk.StringVar(value="4.0")
+        # Recálculo del plan: agrupa ráfagas de cambios y calcula fuera del hilo de Tk
+        self._plan_scheduler = RecalcScheduler(
+            self,
+            collect=self._collect_plan_job,
+            compute=self._compute_plan,
+            apply=self._apply_plan,
+        )
+        # Una sola traza por variable de entrada; ver RecalcGraph
+        self._plan_graph = RecalcGraph(self)
         self._build_home()
         self._build_calc()
         self._build_plan()
@@ -948,6 +905,11 @@ class App(tk.Tk):
         self.nb.add(self.debt_tab, text="Deudas")
         self._build_debt()
         self._apply_font_size()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+    def _on_close(self):
+        # Detiene el recálculo en curso antes de cerrar la ventana
+        self._plan_scheduler.shutdown()
+        self.destroy()
     def set_home_image(self, path: str):
         self.home_image_path = path
         container = getattr(self, "_home_container", None)
@@ -1115,19 +1077,7 @@ class App(tk.Tk):
         except Exception as exc:
             messagebox.showerror("Error", f"Expresión inválida:\\n{exc}")
     def _parse_month_list(self, text: str) -> set[int]:
-        months: set[int] = set()
-        if not text:
-            return months
-        for chunk in text.replace(" ", "").split(","):
-            if not chunk:
-                continue
-            try:
-                month = int(float(chunk))
-            except Exception:
-                continue
-            if 1 <= month <= 12:
-                months.add(month)
-        return months
+        return parse_month_list(text)
     def _collect_debt_inputs(self) -> DebtInputs | None:
         def as_float(value: str | float, default: float = 0.0) -> float:
             try:
@@ -1169,114 +1119,15 @@ class App(tk.Tk):
             skip_months=skip_months,
             inflation_annual=inflation,
         )
-    def _simulate_debt(self, data: DebtInputs) -> tuple[list[tuple[int, float, float, float, float, float, float, float]], dict]:
-        principal = data.cost - data.down_payment
-        if principal <= 0:
-            raise ValueError(self.strings.get("debt_invalid_amount", "Necesitas que el monto financiado sea positivo."))
-        rate = (1.0 + data.cat_annual / 100.0) ** (1.0 / 12.0) - 1.0 if data.cat_annual else 0.0
-        term = max(data.term_months, 1)
-        if rate > 0:
-            payment = rate * principal / (1.0 - (1.0 + rate) ** (-term))
-        else:
-            payment = principal / term
-        payment = max(payment, 0.0)
-        balance = principal
-        rows: list[tuple[int, float, float, float, float, float, float, float]] = []
-        total_interest = 0.0
-        total_paid = 0.0
-        total_fees = 0.0
-        interest_acc = 0.0
-        month = 0
-        open_fee = max(0.0, data.open_pct / 100.0 * data.cost)
-        inflation_rate = data.inflation_annual / 100.0
-        base_inflation = 1.0 + inflation_rate
-        max_months = term + 600
-        while balance > 1e-6 and month < max_months:
-            month += 1
-            interest = balance * rate if rate else 0.0
-            interest = max(interest, 0.0)
-            scheduled_payment = payment
-            principal_payment = 0.0
-            if month in data.skip_months:
-                scheduled_payment = interest
-                principal_payment = 0.0
-            else:
-                principal_payment = max(scheduled_payment - interest, 0.0)
-                if principal_payment > balance:
-                    principal_payment = balance
-                    scheduled_payment = interest + principal_payment
-            balance -= principal_payment
-            extra = 0.0
-            if (
-                month in data.extra_months
-                and month not in data.skip_months
-                and data.extra_amount > 0
-                and balance > 0
-            ):
-                extra = min(data.extra_amount, balance)
-                balance -= extra
-                principal_payment += extra
-            payment_total = scheduled_payment + extra
-            fees = data.insurance_monthly
-            if month == 1:
-                fees += open_fee
-            total_interest += interest
-            total_fees += fees
-            total_paid += payment_total
-            interest_acc += interest
-            if base_inflation > 0:
-                real_balance = balance / (base_inflation ** (month / 12.0))
-            else:
-                real_balance = balance
-            rows.append(
-                (
-                    month,
-                    payment_total,
-                    interest,
-                    principal_payment,
-                    fees,
-                    balance,
-                    interest_acc,
-                    real_balance,
-                )
-            )
-        if balance > 1e-4:
-            raise ValueError("El crédito no se liquida con los parámetros actuales.")
-        months = month
-        total_paid_with_fees = total_paid + total_fees
-        if base_inflation > 0:
-            real_cost = total_paid_with_fees / (base_inflation ** (months / 12.0))
-        else:
-            real_cost = total_paid_with_fees
-        summary = {
-            "months": months,
-            "total_paid": total_paid_with_fees,
-            "total_interest": total_interest,
-            "total_fees": total_fees,
-            "real_cost": real_cost,
-        }
-        return rows, summary
+    def _simulate_debt(self, data: DebtInputs) -> tuple[list[DebtRow], dict]:
+        try:
+            return cached_simulate_debt(data)
+        except DebtError as exc:
+            raise ValueError(self.strings.get(exc.key, str(exc))) from None
     def _render_debt_results(self, rows, summary: dict):
-        if not hasattr(self, "debt_tree"):
+        if not hasattr(self, "debt_table"):
             return
-        for item in self.debt_tree.get_children():
-            self.debt_tree.delete(item)
-        for row in rows:
-            month, payment_total, interest, principal_payment, fees, balance, interest_acc, real_balance = row
-            self.debt_tree.insert(
-                "",
-                "end",
-                values=(
-                    month,
-                    fmt_currency(payment_total),
-                    fmt_currency(interest),
-                    fmt_currency(principal_payment),
-                    fmt_currency(fees),
-                    fmt_currency(balance),
-                    fmt_currency(interest_acc),
-                    fmt_currency(real_balance),
-                ),
-            )
+        self.debt_table.set_rows(rows)
         months = summary.get("months", 0)
         years = months / 12.0 if months else 0.0
         total_paid = summary.get("total_paid", 0.0)
@@ -1386,34 +1237,27 @@ class App(tk.Tk):
         )
         table_frame = ttk.LabelFrame(frm, text=self.strings["debt_table"], padding=12)
         table_frame.pack(fill="both", expand=True, pady=(12, 0))
-        columns = (
-            "month",
-            "payment",
-            "interest",
-            "principal",
-            "fees",
-            "balance",
-            "interest_acc",
-            "real",
+        columns = [
+            ("month", self.strings["debt_col_month"]),
+            ("payment", self.strings["debt_col_payment"]),
+            ("interest", self.strings["debt_col_interest"]),
+            ("principal", self.strings["debt_col_principal"]),
+            ("fees", self.strings["debt_col_fees"]),
+            ("balance", self.strings["debt_col_balance"]),
+            ("interest_acc", self.strings["debt_col_interest_acc"]),
+            ("real", self.strings["debt_col_real"]),
+        ]
+        # Tabla virtual: solo se formatean los meses visibles (hasta plazo + 600)
+        self.debt_table = EvolutionTable(
+            table_frame,
+            columns,
+            formatters={key: fmt_currency for key, _heading in columns[1:]},
+            widths={"month": 70},
+            anchors={"month": "center"},
+            height=12,
         )
-        self.debt_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=12)
-        self.debt_tree.heading("month", text=self.strings["debt_col_month"])
-        self.debt_tree.heading("payment", text=self.strings["debt_col_payment"])
-        self.debt_tree.heading("interest", text=self.strings["debt_col_interest"])
-        self.debt_tree.heading("principal", text=self.strings["debt_col_principal"])
-        self.debt_tree.heading("fees", text=self.strings["debt_col_fees"])
-        self.debt_tree.heading("balance", text=self.strings["debt_col_balance"])
-        self.debt_tree.heading("interest_acc", text=self.strings["debt_col_interest_acc"])
-        self.debt_tree.heading("real", text=self.strings["debt_col_real"])
-        self.debt_tree.column("month", width=70, anchor="center")
-        for col in columns[1:]:
-            self.debt_tree.column(col, anchor="e", width=120)
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.debt_tree.yview)
-        hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=self.debt_tree.xview)
-        self.debt_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        self.debt_tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
-        hsb.grid(row=1, column=0, sticky="ew")
+        self.debt_table.get_frame().grid(row=0, column=0, sticky="nsew")
+        self.debt_tree = self.debt_table.tree
         table_frame.grid_rowconfigure(0, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
         summary_frame = ttk.LabelFrame(frm, text=self.strings["debt_summary"], padding=12)
@@ -1686,6 +1530,7 @@ class App(tk.Tk):
         tree_frame = ttk.Frame(right)
         tree_frame.pack(fill="both", expand=True, padx=0, pady=(8, 0))
         self.tree = ttk.Treeview(tree_frame, columns=cols, show="headings", height=12)
+        self._plan_rows_shown = {}  # iid -> valores mostrados (ver sync_rows)
         self.tree.pack(side="left", fill="both", expand=True)
         sb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
         sb.pack(side="right", fill="y")
@@ -1714,7 +1559,7 @@ class App(tk.Tk):
             self.var_buy_fee, self.var_sell_fee, self.var_entry_spread, self.var_exit_spread, self.var_platform,
             self.var_vol, self.var_mc,
         ):
-            v.trace_add("write", lambda *_: self._recalc())
+            self._plan_graph.bind(v, self._recalc)
         self._recalc()  # mantener
     def _labeled_scale(self, parent, label, var, row, col, from_, to_, step, fmt, help_key=None):
         frame_cls = BOOT.Frame if BOOT else ttk.Frame
@@ -1749,7 +1594,7 @@ class App(tk.Tk):
             command=lambda _v: on_move(),
         ).pack(fill="x")
         on_move()
-        var.trace_add("write", lambda *_: self._recalc())
+        self._plan_graph.bind(var, self._recalc)
     def _labeled_entry(self, parent, label, var, row, col, help_key=None, width=16):
         frame_cls = BOOT.Frame if BOOT else ttk.Frame
         label_cls = BOOT.Label if BOOT else ttk.Label
@@ -1844,267 +1689,62 @@ class App(tk.Tk):
             vol_annual=float(self.var_vol.get() or 0.0),
             mc_runs=int(float(self.var_mc.get() or 0)),
         )
-    def _simulate(self, p: Inputs) -> tuple[list[YearRow], float, float, float, float]:
-        """Simulación por pasos con calendarios de aporte, dividendos y costos avanzados."""
-        freq = p.frequency
-        steps = 12 if freq == "monthly" else (24 if freq == "biweekly" else 1)
-        step_months = 12.0 / steps
-        r_step = (1.0 + p.annual_return / 100.0) ** (step_months / 12.0) - 1.0
-        mgmt_step = (p.mgmt / 100.0) * (step_months / 12.0)
-        infl_y = p.inflation / 100.0
-        g_step = (1.0 + p.contrib_growth / 100.0) ** (step_months / 12.0) - 1.0
-        div_step = (p.div_yield / 100.0) * (step_months / 12.0)
-        div_withhold = 0.0
-        if p.instrument == "mx_stock":
-            div_withhold = 0.10
-        elif p.instrument == "usa_stock":
-            div_withhold = 0.10 if p.w8ben else 0.30
-        debt_withhold_step = 0.0
-        if p.instrument == "mx_debt":
-            debt_withhold_step = (p.tax_gain / 100.0) * (step_months / 12.0)
-        balance = p.initial
-        cum_contrib = p.initial
-        rows: list[YearRow] = []
-        if p.years <= 0:
-            nominal = balance
-            total_contrib = cum_contrib
-            total_gain = max(0.0, nominal - total_contrib)
-            return [], nominal, total_contrib, total_gain, nominal
-        dep_current = p.monthly
-        step_count = p.years * steps
-        year = 1
-        steps_in_year = 0
-        def _parse_months(s: str) -> set[int]:
-            out: set[int] = set()
-            for part in (s or '').split(','):
-                part = part.strip()
-                if part.isdigit():
-                    m = int(part)
-                    if 1 <= m <= 12:
-                        out.add(m)
-            return out
-        extra_set = _parse_months(p.extra_months)
-        skip_set = _parse_months(p.skip_months)
-        fees_year = taxes_year = 0.0
-        gross_contrib_year = net_in_year = 0.0
-        start_balance_year = balance
-        steps_per_month = steps // 12 if steps >= 12 else 1
-        for step in range(1, step_count + 1):
-            if steps >= 12:
-                month_idx = ((step - 1) // steps_per_month) % 12 + 1
-                step_in_month = (step - 1) % steps_per_month
-            else:
-                month_idx = ((step - 1) % 12) + 1
-                step_in_month = 0
-            extra_now = 0.0
-            if month_idx in extra_set:
-                if steps < 12 or step_in_month == 0:
-                    extra_now = p.extra_amount
-            skip_now = month_idx in skip_set
-            dep = 0.0 if skip_now else dep_current
-            dep += extra_now
-            if p.timing == "begin" and dep > 0:
-                fee_dep = dep * (p.fee_deposit / 100.0)
-                iva_dep = fee_dep * (p.vat_on_fees / 100.0)
-                net_dep = dep - fee_dep
-                balance += net_dep
-                cum_contrib += dep
-                gross_contrib_year += dep
-                net_in_year += net_dep
-                fees_year += (fee_dep + iva_dep)
-            if mgmt_step > 0:
-                fee_mgmt = balance * mgmt_step
-                iva_mgmt = fee_mgmt * (p.vat_on_fees / 100.0)
-                balance -= fee_mgmt
-                fees_year += (fee_mgmt + iva_mgmt)
-            if p.custody_fixed > 0.0:
-                fee_fix = p.custody_fixed * (step_months / 1.0)
-                iva_fix = fee_fix * (p.vat_on_fees / 100.0)
-                balance -= fee_fix
-                fees_year += (fee_fix + iva_fix)
-            if p.platform_fixed > 0.0:
-                fee_plat = p.platform_fixed * (step_months / 1.0)
-                iva_plat = fee_plat * (p.vat_on_fees / 100.0)
-                balance -= fee_plat
-                fees_year += (fee_plat + iva_plat)
-            interest = balance * r_step
-            balance += interest
-            if debt_withhold_step > 0 and interest > 0:
-                tax_i = interest * debt_withhold_step
-                balance -= tax_i
-                taxes_year += tax_i
-            if div_step > 0:
-                gross_div = balance * div_step
-                tax_div = gross_div * div_withhold
-                net_div = gross_div - tax_div
-                taxes_year += tax_div
-                if p.div_policy == "reinvest":
-                    balance += net_div
-            if p.timing == "end" and dep > 0:
-                fee_dep = dep * (p.fee_deposit / 100.0)
-                iva_dep = fee_dep * (p.vat_on_fees / 100.0)
-                net_dep = dep - fee_dep
-                balance += net_dep
-                cum_contrib += dep
-                gross_contrib_year += dep
-                net_in_year += net_dep
-                fees_year += (fee_dep + iva_dep)
-            dep_current *= (1.0 + g_step)
-            steps_in_year += 1
-            if steps_in_year == steps:
-                if p.instrument not in ("mx_stock",):
-                    gain_before_tax = balance - start_balance_year - net_in_year
-                    tax = (gain_before_tax * (p.tax_gain / 100.0)) if gain_before_tax > 0 else 0.0
-                    taxes_year += tax
-                    balance -= tax
-                real_val = balance / ((1.0 + infl_y) ** year)
-                gain_cum = balance - cum_contrib
-                rows.append(YearRow(
-                    year=year,
-                    final_balance=balance,
-                    cum_contrib=cum_contrib,
-                    gain=gain_cum,
-                    real_value=real_val,
-                    fees=fees_year,
-                    taxes=taxes_year,
-                ))
-                start_balance_year = balance
-                fees_year = taxes_year = 0.0
-                gross_contrib_year = net_in_year = 0.0
-                steps_in_year = 0
-                year += 1
-        if p.buy_sell > 0:
-            fee_bs = balance * (p.buy_sell / 100.0)
-            iva_bs = fee_bs * (p.vat_on_fees / 100.0)
-            balance -= fee_bs
-            rows[-1] = YearRow(
-                year=rows[-1].year,
-                final_balance=balance,
-                cum_contrib=rows[-1].cum_contrib,
-                gain=balance - rows[-1].cum_contrib,
-                real_value=balance / ((1.0 + infl_y) ** p.years),
-                fees=rows[-1].fees + fee_bs + iva_bs,
-                taxes=rows[-1].taxes,
-            )
-        if p.sell_fee > 0:
-            fee_sell = balance * (p.sell_fee / 100.0)
-            iva_sell = fee_sell * (p.vat_on_fees / 100.0)
-            balance -= fee_sell
-            last = rows[-1]
-            rows[-1] = YearRow(
-                year=last.year,
-                final_balance=balance,
-                cum_contrib=last.cum_contrib,
-                gain=balance - last.cum_contrib,
-                real_value=balance / ((1.0 + infl_y) ** p.years),
-                fees=last.fees + fee_sell + iva_sell,
-                taxes=last.taxes,
-            )
-        if p.market_spread > 0:
-            spread_loss = balance * (p.market_spread / 100.0)
-            balance -= spread_loss
-            last = rows[-1]
-            rows[-1] = YearRow(
-                year=last.year,
-                final_balance=balance,
-                cum_contrib=last.cum_contrib,
-                gain=balance - last.cum_contrib,
-                real_value=balance / ((1.0 + infl_y) ** p.years),
-                fees=last.fees + spread_loss,
-                taxes=last.taxes,
-            )
-        if p.exit_spread > 0:
-            spr = balance * (p.exit_spread / 100.0)
-            balance -= spr
-            last = rows[-1]
-            rows[-1] = YearRow(
-                year=last.year,
-                final_balance=balance,
-                cum_contrib=last.cum_contrib,
-                gain=balance - last.cum_contrib,
-                real_value=balance / ((1.0 + infl_y) ** p.years),
-                fees=last.fees + spr,
-                taxes=last.taxes,
-            )
-        if p.instrument == "mx_stock":
-            gain_total = max(0.0, balance - rows[-1].cum_contrib)
-            tax_final = gain_total * (p.tax_gain / 100.0)
-            balance -= tax_final
-            last = rows[-1]
-            rows[-1] = YearRow(
-                year=last.year,
-                final_balance=balance,
-                cum_contrib=last.cum_contrib,
-                gain=balance - last.cum_contrib,
-                real_value=balance / ((1.0 + infl_y) ** p.years),
-                fees=last.fees,
-                taxes=last.taxes + tax_final,
-            )
-            if abs(p.tax_gain - 10.0) > 0.1:
-                print("[INFO] Acciones MX: ISR por defecto es 10% al vender. Has establecido:", p.tax_gain)
-        for rr in rows:
-            if abs((rr.cum_contrib + rr.gain) - rr.final_balance) > 0.01:
-                print(f"[WARN] Ano {rr.year}: final != contrib + ganancia {rr.final_balance:.2f} vs {(rr.cum_contrib + rr.gain):.2f}")
-        nominal = balance
-        total_contrib = cum_contrib
-        total_gain = max(0.0, nominal - total_contrib)
-        real_total = nominal / ((1.0 + infl_y) ** p.years)
-        return rows, nominal, total_contrib, total_gain, real_total
+    def _simulate(self, p: Inputs, rows: bool = True) -> tuple[YearTable, float, float, float, float]:
+        """Simulación por pasos; delega en el motor headless de backend.core.invest_calc.
+
+        ``rows=False`` devuelve la tabla vacía y solo calcula los totales.
+        """
+        return cached_simulate(p, rows=rows)
     def _recalc(self):
-        p = self._collect_inputs()
+        """Pide un recálculo del plan; se agrupa y corre en segundo plano."""
+        self._plan_scheduler.request()
+    def _collect_plan_job(self):
+        # Hilo de Tk: leer variables y estado de la UI.
+        has_mc_labels = all(getattr(self, name, None) is not None for name in ("lbl_p5", "lbl_p50", "lbl_p95"))
+        return self._collect_inputs(), has_mc_labels
+    def _compute_plan(self, job, cancel):
+        # Hilo de trabajo: solo cálculo, nada de Tk.
+        p, has_mc_labels = job
         if p.monthly <= 0 and p.initial <= 0:
+            return p, None, None
+        result = self._simulate(p)
+        mc = None
+        if has_mc_labels and p.mc_runs and p.vol_annual > 0 and p.years > 0 and not cancel.is_set():
+            mc = cached_simulate_mc(p, runs=min(MC_MAX_RUNS, int(p.mc_runs)), cancel=cancel)
+        return p, result, mc
+    def _apply_plan(self, outcome):
+        p, result, mc = outcome
+        if result is None:
             self._clear_summary()
             return
-        rows, nominal, contrib, gain, real = self._simulate(p)
+        rows, nominal, contrib, gain, real = result
         # resumen
         self.lbl_nominal.config(text=f"{self.strings['nominal_value']}  {fmt_currency(nominal)}")
         self.lbl_total.config(text=f"{self.strings['total_contrib']}  {fmt_currency(contrib)}")
         self.lbl_gain.config(text=f"{self.strings['gain']}  {fmt_currency(gain)}")
         self.lbl_real.config(text=f"{self.strings['real_value']}  {fmt_currency(real)}")
-        # tabla
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        for r in rows:
-            self.tree.insert("", "end", values=(
-                r.year,
-                fmt_currency(r.final_balance),
-                fmt_currency(r.cum_contrib),
-                fmt_currency(r.gain),
-                fmt_currency(r.real_value),
-                fmt_currency(r.fees),
-                fmt_currency(r.taxes),
-            ))
+        # tabla: iid persistente por año, solo se reescriben las celdas que cambian
+        sync_rows(
+            self.tree,
+            (
+                (f"y{r.year}", (
+                    str(r.year),
+                    fmt_currency(r.final_balance),
+                    fmt_currency(r.cum_contrib),
+                    fmt_currency(r.gain),
+                    fmt_currency(r.real_value),
+                    fmt_currency(r.fees),
+                    fmt_currency(r.taxes),
+                ))
+                for r in rows
+            ),
+            self._plan_rows_shown,
+        )
         has_mc_labels = all(getattr(self, name, None) is not None for name in ("lbl_p5", "lbl_p50", "lbl_p95"))
-        if has_mc_labels and p.mc_runs and p.vol_annual > 0 and p.years > 0:
-            import random
-            import math
-            freq = p.frequency
-            steps = 12 if freq == "monthly" else (24 if freq == "biweekly" else 1)
-            step_months = 12.0 / steps
-            sigma_a = p.vol_annual / 100.0
-            sigma_step = sigma_a * math.sqrt(step_months / 12.0)
-            g_step = (1.0 + p.contrib_growth / 100.0) ** (step_months / 12.0) - 1.0
-            runs = max(10, min(5000, int(p.mc_runs)))
-            finals: list[float] = []
-            for _ in range(runs):
-                b = p.initial
-                dep = p.monthly
-                for _s in range(int(p.years * steps)):
-                    mu = math.log(1 + p.annual_return / 100.0) * (step_months / 12.0) - 0.5 * sigma_step * sigma_step
-                    rnd = math.exp(random.gauss(mu, sigma_step))
-                    b += dep
-                    b *= rnd
-                    dep *= (1.0 + g_step)
-                finals.append(b)
-            finals.sort()
-            def _q(pct: float) -> float:
-                if not finals:
-                    return 0.0
-                k = max(0, min(len(finals) - 1, int(round(pct * (len(finals) - 1)))))
-                return finals[k]
-            self.lbl_p5.config(text=f"{self.strings.get('p5','P5 final')}: {fmt_currency(_q(0.05))}")
-            self.lbl_p50.config(text=f"{self.strings.get('p50','P50 final')}: {fmt_currency(_q(0.50))}")
-            self.lbl_p95.config(text=f"{self.strings.get('p95','P95 final')}: {fmt_currency(_q(0.95))}")
+        if has_mc_labels and mc is not None:
+            self.lbl_p5.config(text=f"{self.strings.get('p5','P5 final')}: {fmt_currency(mc.p5)}")
+            self.lbl_p50.config(text=f"{self.strings.get('p50','P50 final')}: {fmt_currency(mc.p50)}")
+            self.lbl_p95.config(text=f"{self.strings.get('p95','P95 final')}: {fmt_currency(mc.p95)}")
         elif has_mc_labels:
             self.lbl_p5.config(text=f"{self.strings.get('p5','P5 final')}: -")
             self.lbl_p50.config(text=f"{self.strings.get('p50','P50 final')}: -")
@@ -2114,8 +1754,7 @@ class App(tk.Tk):
         self.lbl_total.config(text='{}: '.format(self.strings['total_contrib']))
         self.lbl_gain.config(text='{}: '.format(self.strings['gain']))
         self.lbl_real.config(text='{}: '.format(self.strings['real_value']))
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        sync_rows(self.tree, (), self._plan_rows_shown)
     # ---------- Actions ----------
     def _copy_summary(self):
         try:
@@ -2184,6 +1823,8 @@ class App(tk.Tk):
         # Reconstruir contenidos sensibles a idioma
         for w in self.home_tab.winfo_children():
             w.destroy()
+        self._plan_scheduler.cancel()
+        self._plan_graph.clear()
         for w in self.plan_tab.winfo_children():
             w.destroy()
         for w in self.debt_tab.winfo_children():
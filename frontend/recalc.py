@@ -0,0 +1,190 @@
+"""
+recalc.py
+---------
+Planificador de recálculos para pestañas con muchos controles (plan de inversión).
+
+Cada cambio en un slider o campo llama a :meth:`RecalcScheduler.request`. Las
+ráfagas se agrupan con una ventana de *debounce*; al vencer, los insumos se
+leen en el hilo de Tk y el cálculo pesado (simulación + Monte Carlo) corre en
+un hilo de trabajo. El resultado vuelve al hilo de Tk con ``after()``; si
+mientras tanto llegó otra petición, el resultado viejo se descarta y el
+cálculo en curso recibe la señal de cancelación.
+
+:class:`RecalcGraph` es el registro central variable -> suscriptores: cada
+variable Tk recibe una sola traza sin importar cuántas veces se registre, y
+las escrituras encadenadas dentro del mismo evento (p. ej. el ajuste del
+slider al paso) se entregan una sola vez a cada suscriptor.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import tkinter as tk
+
+
+class RecalcScheduler:
+    """Debounced, cancellable background recalculation bound to a Tk widget.
+
+    ``collect()`` runs on the Tk thread and returns the job inputs;
+    ``compute(job, cancel)`` runs on a worker thread and should check
+    ``cancel.is_set()`` between expensive stages; ``apply(result)`` runs on the
+    Tk thread with the result of the latest job only.
+    """
+
+    def __init__(
+        self,
+        widget: tk.Misc,
+        collect: Callable[[], Any],
+        compute: Callable[[Any, threading.Event], Any],
+        apply: Callable[[Any], None],
+        delay_ms: int = 120,
+        poll_ms: int = 15,
+    ) -> None:
+        self.widget = widget
+        self.collect = collect
+        self.compute = compute
+        self.apply = apply
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recalc")
+        self._after_id: Optional[str] = None
+        self._generation = 0
+        self._future: Optional[Future] = None
+        self._cancel = threading.Event()
+        # Contadores para pruebas/diagnóstico
+        self.requests = 0
+        self.runs = 0
+
+    def request(self) -> None:
+        """Schedule a recalculation, restarting the debounce window.
+
+        The in-flight job is invalidated right away, not when the window
+        expires: its result will not be applied and it is told to stop.
+        """
+        self.requests += 1
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._invalidate()
+        self._after_id = self.widget.after(self.delay_ms, self._start)
+
+    def flush(self) -> None:
+        """Start the pending recalculation immediately (if any)."""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._start()
+
+    def cancel(self) -> None:
+        """Drop the pending request and abandon the in-flight job."""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._invalidate()
+
+    def shutdown(self) -> None:
+        """Cancel everything and release the worker thread (window closing)."""
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _invalidate(self) -> None:
+        self._generation += 1
+        self._cancel.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    def _start(self) -> None:
+        self._after_id = None
+        self.cancel()
+        job = self.collect()
+        self.runs += 1
+        self._cancel = threading.Event()
+        self._future = self._executor.submit(self.compute, job, self._cancel)
+        self._poll(self._generation, self._future)
+
+    def _poll(self, generation: int, future: Future) -> None:
+        if generation != self._generation:
+            return  # llegó otra petición: este resultado ya es viejo
+        if not future.done():
+            self.widget.after(self.poll_ms, self._poll, generation, future)
+            return
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception:
+            self.widget.report_callback_exception(*sys.exc_info())
+            return
+        self.apply(result)
+
+
+class RecalcGraph:
+    """Central map of Tk input variables to recalc subscribers.
+
+    ``bind(var, subscriber)`` installs at most one ``write`` trace per
+    variable. Writes mark the variable's subscribers dirty and a single
+    ``after_idle`` flush calls each dirty subscriber once, so one UI event
+    triggers at most one recompute per subscriber however many variables (or
+    nested ``var.set`` calls) it touched.
+
+    ``flushes`` counts UI events that reached subscribers and
+    ``last_flush_notifications`` how many subscriber calls (recomputes) the
+    latest one caused; with a single subscriber it is always 1.
+    """
+
+    def __init__(self, widget: tk.Misc) -> None:
+        self.widget = widget
+        self._vars: Dict[str, Tuple[tk.Variable, str]] = {}
+        self._subs: Dict[str, List[Callable[[], None]]] = {}
+        self._dirty: List[Callable[[], None]] = []
+        self._flush_id: Optional[str] = None
+        # Contadores para pruebas/diagnóstico
+        self.events = 0
+        self.notifications = 0
+        self.flushes = 0
+        self.last_flush_notifications = 0
+
+    def bind(self, var: tk.Variable, subscriber: Callable[[], None]) -> None:
+        name = str(var)
+        if name not in self._vars:
+            trace_id = var.trace_add("write", lambda *_args, _name=name: self._on_write(_name))
+            self._vars[name] = (var, trace_id)
+        subs = self._subs.setdefault(name, [])
+        if subscriber not in subs:
+            subs.append(subscriber)
+
+    def clear(self) -> None:
+        """Remove every trace (e.g. before rebuilding a tab's widgets)."""
+        for var, trace_id in self._vars.values():
+            try:
+                var.trace_remove("write", trace_id)
+            except tk.TclError:
+                pass
+        self._vars.clear()
+        self._subs.clear()
+        self._dirty.clear()
+        if self._flush_id is not None:
+            self.widget.after_cancel(self._flush_id)
+            self._flush_id = None
+
+    def _on_write(self, name: str) -> None:
+        self.events += 1
+        for subscriber in self._subs.get(name, ()):
+            if subscriber not in self._dirty:
+                self._dirty.append(subscriber)
+        if self._dirty and self._flush_id is None:
+            self._flush_id = self.widget.after_idle(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_id = None
+        dirty, self._dirty = self._dirty, []
+        self.flushes += 1
+        self.last_flush_notifications = len(dirty)
+        for subscriber in dirty:
+            self.notifications += 1
+            subscriber()
+
+
+__all__ = ["RecalcScheduler", "RecalcGraph"]
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import tkinter as tk
 from tkinter import messagebox, ttk
 
+from backend.core.cache import cached_simulate_debt
+from backend.core.calc import DebtError, DebtInputs, DebtRow, parse_month_list
+from frontend.components.evolution_table import EvolutionTable
 from frontend.i18n import get_strings
 
 STRINGS = get_strings()
@@ -18,135 +20,12 @@ def fmt_currency(value: float, symbol: str = "MX$") -> str:
         return f"{symbol} {value:.2f}"
 
 
-@dataclass
-class DebtInputs:
-    title: str
-    cost: float
-    down_payment: float
-    cat_annual: float
-    open_pct: float
-    insurance_monthly: float
-    term_months: int
-    extra_months: Set[int]
-    extra_amount: float
-    skip_months: Set[int]
-    inflation_annual: float
-
-
-def _parse_month_list(text: str) -> Set[int]:
-    months: Set[int] = set()
-    if not text:
-        return months
-    for chunk in text.replace(" ", "").split(","):
-        if not chunk:
-            continue
-        try:
-            month = int(float(chunk))
-        except Exception:
-            continue
-        if 1 <= month <= 12:
-            months.add(month)
-    return months
-
-
-def simulate_debt(data: DebtInputs) -> Tuple[List[Tuple[int, float, float, float, float, float, float, float]], Dict[str, float]]:
-    strings = STRINGS
-    principal = data.cost - data.down_payment
-    if principal <= 0:
-        raise ValueError(strings.get("debt_invalid_amount", "Necesitas que el monto financiado sea positivo."))
-
-    rate = (1.0 + data.cat_annual / 100.0) ** (1.0 / 12.0) - 1.0 if data.cat_annual else 0.0
-    term = max(data.term_months, 1)
-
-    if rate > 0:
-        payment = rate * principal / (1.0 - (1.0 + rate) ** (-term))
-    else:
-        payment = principal / term
-    payment = max(payment, 0.0)
-
-    balance = principal
-    rows: List[Tuple[int, float, float, float, float, float, float, float]] = []
-    total_interest = 0.0
-    total_paid = 0.0
-    total_fees = 0.0
-    interest_acc = 0.0
-    month = 0
-    open_fee = max(0.0, data.open_pct / 100.0 * data.cost)
-    inflation_rate = data.inflation_annual / 100.0
-    base_inflation = 1.0 + inflation_rate
-    max_months = term + 600
-
-    while balance > 1e-6 and month < max_months:
-        month += 1
-        interest = balance * rate if rate else 0.0
-        interest = max(interest, 0.0)
-        scheduled_payment = payment
-        principal_payment = 0.0
-
-        if month in data.skip_months:
-            scheduled_payment = interest
-            principal_payment = 0.0
-        else:
-            principal_payment = max(scheduled_payment - interest, 0.0)
-            if principal_payment > balance:
-                principal_payment = balance
-                scheduled_payment = interest + principal_payment
-
-        balance -= principal_payment
-
-        extra = 0.0
-        if month in data.extra_months and month not in data.skip_months and data.extra_amount > 0 and balance > 0:
-            extra = min(data.extra_amount, balance)
-            balance -= extra
-            principal_payment += extra
-
-        payment_total = scheduled_payment + extra
-        fees = data.insurance_monthly
-        if month == 1:
-            fees += open_fee
-
-        total_interest += interest
-        total_fees += fees
-        total_paid += payment_total
-        interest_acc += interest
-
-        if base_inflation > 0:
-            real_balance = balance / (base_inflation ** (month / 12.0))
-        else:
-            real_balance = balance
-
-        rows.append(
-            (
-                month,
-                payment_total,
-                interest,
-                principal_payment,
-                fees,
-                balance,
-                interest_acc,
-                real_balance,
-            )
-        )
-
-    if balance > 1e-4:
-        raise ValueError(strings.get("debt_not_liquidated", "El crédito no se liquida con los parámetros actuales."))
-
-    months = month
-    total_paid_with_fees = total_paid + total_fees
-    if base_inflation > 0:
-        real_cost = total_paid_with_fees / (base_inflation ** (months / 12.0))
-    else:
-        real_cost = total_paid_with_fees
-
-    summary = {
-        "months": months,
-        "total_paid": total_paid_with_fees,
-        "total_interest": total_interest,
-        "total_fees": total_fees,
-        "real_cost": real_cost,
-    }
-
-    return rows, summary
+def simulate_debt(data: DebtInputs) -> Tuple[List[DebtRow], Dict[str, float]]:
+    """Run the (cached) backend engine and translate its error messages."""
+    try:
+        return cached_simulate_debt(data)
+    except DebtError as exc:
+        raise ValueError(STRINGS.get(exc.key, str(exc))) from None
 
 
 class DebtScreen(ttk.Frame):
@@ -203,41 +82,27 @@ class DebtScreen(ttk.Frame):
         table_frame.columnconfigure(0, weight=1)
         table_frame.rowconfigure(0, weight=1)
 
-        columns = (
-            "month",
-            "payment",
-            "interest",
-            "principal",
-            "fees",
-            "balance",
-            "interest_acc",
-            "real",
+        columns = [
+            ("month", self.strings["debt_col_month"]),
+            ("payment", self.strings["debt_col_payment"]),
+            ("interest", self.strings["debt_col_interest"]),
+            ("principal", self.strings["debt_col_principal"]),
+            ("fees", self.strings["debt_col_fees"]),
+            ("balance", self.strings["debt_col_balance"]),
+            ("interest_acc", self.strings["debt_col_interest_acc"]),
+            ("real", self.strings["debt_col_real"]),
+        ]
+        # Tabla virtual: solo se formatean los meses visibles
+        self.debt_table = EvolutionTable(
+            table_frame,
+            columns,
+            formatters={key: fmt_currency for key, _heading in columns[1:]},
+            widths={"month": 70},
+            anchors={"month": "center"},
+            height=12,
         )
-
-        self.debt_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=12)
-        self.debt_tree.grid(row=0, column=0, sticky="nsew")
-
-        self.debt_tree.heading("month", text=self.strings["debt_col_month"])
-        self.debt_tree.column("month", width=70, anchor="center")
-
-        for col in columns[1:]:
-            heading_key = {
-                "payment": "debt_col_payment",
-                "interest": "debt_col_interest",
-                "principal": "debt_col_principal",
-                "fees": "debt_col_fees",
-                "balance": "debt_col_balance",
-                "interest_acc": "debt_col_interest_acc",
-                "real": "debt_col_real",
-            }[col]
-            self.debt_tree.heading(col, text=self.strings[heading_key])
-            self.debt_tree.column(col, anchor="e", width=120)
-
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.debt_tree.yview)
-        hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=self.debt_tree.xview)
-        self.debt_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        vsb.grid(row=0, column=1, sticky="ns")
-        hsb.grid(row=1, column=0, sticky="ew")
+        self.debt_table.get_frame().grid(row=0, column=0, sticky="nsew")
+        self.debt_tree = self.debt_table.tree
 
         summary = ttk.LabelFrame(container, text=self.strings["debt_summary"], padding=12)
         summary.grid(row=2, column=0, sticky="ew", pady=(12, 0))
@@ -302,8 +167,8 @@ class DebtScreen(ttk.Frame):
             messagebox.showerror(self.strings["tab_debt"], self.strings["debt_invalid_amount"])
             return None
 
-        extra_months = _parse_month_list(self.var_extra_months.get())
-        skip_months = _parse_month_list(self.var_skip_months.get())
+        extra_months = parse_month_list(self.var_extra_months.get())
+        skip_months = parse_month_list(self.var_skip_months.get())
         title = self.var_title.get().strip() or self.strings.get("debt_default_title", "Credito")
 
         return DebtInputs(
@@ -331,26 +196,8 @@ class DebtScreen(ttk.Frame):
             return
         self._render_results(rows, summary)
 
-    def _render_results(self, rows: List[Tuple[int, float, float, float, float, float, float, float]], summary: Dict[str, float]) -> None:
-        for item in self.debt_tree.get_children():
-            self.debt_tree.delete(item)
-
-        for row in rows:
-            month, payment_total, interest, principal_payment, fees, balance, interest_acc, real_balance = row
-            self.debt_tree.insert(
-                "",
-                "end",
-                values=(
-                    month,
-                    fmt_currency(payment_total),
-                    fmt_currency(interest),
-                    fmt_currency(principal_payment),
-                    fmt_currency(fees),
-                    fmt_currency(balance),
-                    fmt_currency(interest_acc),
-                    fmt_currency(real_balance),
-                ),
-            )
+    def _render_results(self, rows: List[DebtRow], summary: Dict[str, float]) -> None:
+        self.debt_table.set_rows(rows)
 
         months = summary.get("months", 0)
         years = months / 12.0 if months else 0.0
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
 
+from frontend.components.evolution_table import EvolutionTable
 from frontend.i18n import get_strings
 from frontend.layout.section_frame import SectionFrame
 from frontend.theme.base_theme import get_theme
@@ -135,28 +136,25 @@ class PlanScreen(tk.Frame):
         table_frame = tk.Frame(summary_card, bg=self.theme["bg_panel"])
         table_frame.pack(fill="both", expand=True, pady=(self.theme["padding"], 0))
 
-        columns = ("year", "balance", "contrib", "gain", "real", "fees", "taxes")
-        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=8)
-        self.tree.pack(side="left", fill="both", expand=True)
-
-        headings = {
-            "year": self.strings["years"],
-            "balance": self.strings["final_balance"],
-            "contrib": self.strings["cum_contrib"],
-            "gain": self.strings["gain_col"],
-            "real": self.strings["real_col"],
-            "fees": self.strings["fees_col"],
-            "taxes": self.strings["taxes_col"],
-        }
-
-        for col in columns:
-            anchor = "center" if col == "year" else "e"
-            self.tree.heading(col, text=headings[col])
-            self.tree.column(col, anchor=anchor, stretch=True, width=140)
-
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        columns = [
+            ("year", self.strings["years"]),
+            ("balance", self.strings["final_balance"]),
+            ("contrib", self.strings["cum_contrib"]),
+            ("gain", self.strings["gain_col"]),
+            ("real", self.strings["real_col"]),
+            ("fees", self.strings["fees_col"]),
+            ("taxes", self.strings["taxes_col"]),
+        ]
+        self.table = EvolutionTable(
+            table_frame,
+            columns,
+            formatters={key: self._format_currency for key, _heading in columns[1:]},
+            widths={key: 140 for key, _heading in columns},
+            anchors={"year": "center"},
+            height=8,
+        )
+        self.table.get_frame().pack(fill="both", expand=True)
+        self.tree = self.table.tree
 
     def _recalcular(self) -> None:
         monto_inicial = self._to_float(self.var_monto_inicial.get())
@@ -173,7 +171,7 @@ class PlanScreen(tk.Frame):
         comisiones_acumuladas = 0.0
         impuestos_acumulados = 0.0
 
-        self.tree.delete(*self.tree.get_children())
+        rows = []
 
         for year in range(1, horizonte + 1):
             aportes_anuales = aporte_mensual * 12
@@ -192,20 +190,20 @@ class PlanScreen(tk.Frame):
 
             valor_real = balance_neto / ((1 + inflacion) ** year)
 
-            self.tree.insert(
-                "",
-                "end",
-                values=(
+            rows.append(
+                (
                     year,
-                    self._format_currency(balance_neto),
-                    self._format_currency(aportes_acumulados),
-                    self._format_currency(ganancia_bruta),
-                    self._format_currency(valor_real),
-                    self._format_currency(comisiones_acumuladas),
-                    self._format_currency(impuestos_acumulados),
-                ),
+                    balance_neto,
+                    aportes_acumulados,
+                    ganancia_bruta,
+                    valor_real,
+                    comisiones_acumuladas,
+                    impuestos_acumulados,
+                )
             )
 
+        self.table.set_rows(rows)
+
         valor_final_nominal = balance - impuestos_acumulados
         valor_real_final = valor_final_nominal / ((1 + inflacion) ** horizonte)
 
@@ -0,0 +1,30 @@
+"""
+Configuración común de las pruebas.
+
+``backend.app`` configura la base de datos y bcrypt al importarse: antes de
+eso se fija una SQLite en memoria (nada de ``instance/data.db``) y un costo
+de bcrypt bajo para que las pruebas de login sean rápidas.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+
+
+@pytest.fixture()
+def app():
+    flask_app = pytest.importorskip("backend.app")
+    with flask_app.app.app_context():
+        flask_app.db.drop_all()
+        flask_app.db.create_all()
+    yield flask_app.app
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
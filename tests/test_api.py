@@ -0,0 +1,140 @@
+"""
+test_api.py
+-----------
+Endpoints de simulación con el cliente de pruebas de Flask: JSON, NDJSON
+(con errores por línea) y el formato binario por columnas decodificado con
+``packing.unpack`` para los tres tipos.
+"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from backend.core.calc import DEBT_COLUMNS, simulate_debt
+from backend.core.invest_calc import ROW_FIELDS, simulate
+from backend.core.packing import ARROW_MIME, PACKED_MIME, unpack
+from backend.core.payloads import debt_from_dict, inputs_from_dict
+
+NDJSON = {"Accept": "application/x-ndjson"}
+PACKED = {"Accept": PACKED_MIME}
+
+PLANS = [
+    {"initial": 1000, "monthly": 100, "years": 3, "extra_months": [6, 12], "extra_amount": 50, "custody_fixed": 5},
+    {"monthly": 500, "years": 2, "frequency": "biweekly"},
+]
+DEBTS = [
+    {"cost": 100000, "down_payment": 10000, "cat_annual": 12, "open_pct": 1, "insurance_monthly": 100, "term_months": 12},
+    {"cost": 100, "down_payment": 200, "cat_annual": 12, "open_pct": 1, "insurance_monthly": 0, "term_months": 12},
+]
+MC = {"scenarios": [{"monthly": 1000, "years": 10, "vol_annual": 15}], "runs": 200, "seed": 1}
+
+
+def ndjson_lines(response):
+    assert response.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_investment_json(client):
+    response = client.post("/simulate/investment", json={"scenarios": PLANS, "rows": True})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    for data, out in zip(PLANS, results):
+        want = simulate(inputs_from_dict(data))
+        assert out["nominal"] == want.nominal and out["real_total"] == want.real_total
+        assert out["rows"] == {name: want.rows.column(name).tolist() for name in ROW_FIELDS}
+
+
+def test_summary_only_and_errors(client):
+    out = client.post("/simulate/investment", json={"scenarios": PLANS[:1], "rows": False}).get_json()
+    assert "rows" not in out["results"][0]
+    response = client.post("/simulate/investment", json=[{"monthly": 100}, {"years": "x"}])
+    assert response.status_code == 400 and response.get_json()["index"] == 1
+    assert client.post("/simulate/investment", data="nope").status_code == 400
+    assert client.post("/simulate/investment", json=[{"frequency": "weekly"}]).status_code == 400
+    assert client.post("/simulate/investment", json=[{}], headers={"Accept": "text/csv"}).status_code == 406
+
+
+def test_debt_json_reports_failed_credit_in_place(client):
+    results = client.post("/simulate/debt", json={"scenarios": DEBTS, "rows": False}).get_json()["results"]
+    assert results[0]["summary"] == simulate_debt(debt_from_dict(DEBTS[0]), rows=False)[1]
+    assert results[1]["error"] == "debt_invalid_amount"
+
+
+def test_montecarlo_json(client):
+    out = client.post("/simulate/montecarlo", json=MC).get_json()["results"][0]
+    assert out["runs"] == 200 and len(out["quantiles"]) == len(out["percentiles"]) == 101
+    assert out["p5"] <= out["p50"] <= out["p95"]
+    assert client.post("/simulate/montecarlo", json=MC).get_json()["results"][0] == out
+
+
+def test_ndjson_streams_one_line_per_scenario_with_errors(client):
+    response = client.post("/simulate/investment", json=[PLANS[1], {"years": "x"}, {"monthly": 5}], headers=NDJSON)
+    assert response.status_code == 200
+    lines = ndjson_lines(response)
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert "error" in lines[1] and "nominal" not in lines[1]
+    assert lines[0]["nominal"] == simulate(inputs_from_dict(PLANS[1])).nominal
+    assert lines[2]["nominal"] == simulate(inputs_from_dict({"monthly": 5})).nominal
+
+    debt = ndjson_lines(client.post("/simulate/debt", json=DEBTS, headers=NDJSON))
+    assert debt[1]["error"] == "debt_invalid_amount" and "summary" in debt[0]
+    mc = ndjson_lines(client.post("/simulate/montecarlo", json=MC, headers=NDJSON))
+    assert mc[0]["index"] == 0 and mc[0]["runs"] == 200
+
+
+def test_ndjson_engine_failure_is_a_line(client, monkeypatch):
+    import backend.app as api
+
+    def flaky(p, rows=True):
+        if p.monthly == 13:
+            raise OverflowError("math range error")
+        return simulate(p, rows=rows)
+
+    monkeypatch.setattr(api, "cached_simulate", flaky)
+    lines = ndjson_lines(client.post("/simulate/investment", json=[{"monthly": 1}, {"monthly": 13}, {"monthly": 2}], headers=NDJSON))
+    assert [("error" in line) for line in lines] == [False, True, False]
+    assert "math range error" in lines[1]["error"]
+    response = client.post("/simulate/investment", json=[{"monthly": 1}, {"monthly": 13}])
+    assert response.status_code == 400 and response.get_json()["index"] == 1
+
+
+def test_packed_investment_round_trip(client):
+    response = client.post("/simulate/investment", json=PLANS, headers=PACKED)
+    assert response.status_code == 200 and response.mimetype == PACKED_MIME
+    packed = unpack(response.data)
+    assert packed.kind == "investment" and packed.columns == tuple(ROW_FIELDS)
+    for i, data in enumerate(PLANS):
+        want = simulate(inputs_from_dict(data))
+        assert tuple(packed.summary[i]) == tuple(want[1:])
+        rows = packed.rows(i)
+        for name in ROW_FIELDS:
+            assert list(rows[name]) == list(want.rows.column(name)), name
+
+
+def test_packed_debt_round_trip(client):
+    packed = unpack(client.post("/simulate/debt", json=DEBTS, headers=PACKED).data)
+    assert packed.kind == "debt" and packed.columns == DEBT_COLUMNS
+    rows, summary = simulate_debt(debt_from_dict(DEBTS[0]))
+    assert tuple(packed.summary[0]) == tuple(summary[name] for name in packed.summary_fields)
+    assert [list(packed.rows(0)[name]) for name in DEBT_COLUMNS] == [list(col) for col in zip(*rows)]
+    # El crédito que no se puede calcular: resumen NaN y sin filas.
+    assert all(value != value for value in packed.summary[1])
+    assert len(packed.rows(1)["month"]) == 0
+
+
+def test_packed_montecarlo_round_trip(client):
+    json_out = client.post("/simulate/montecarlo", json=MC).get_json()["results"][0]
+    packed = unpack(client.post("/simulate/montecarlo", json=MC, headers=PACKED).data)
+    assert packed.kind == "montecarlo"
+    assert tuple(packed.summary[0]) == (json_out["p5"], json_out["p50"], json_out["p95"], json_out["runs"])
+    assert list(packed.rows(0)["quantiles"]) == json_out["quantiles"]
+    assert list(packed.rows(0)["percentiles"]) == json_out["percentiles"]
+
+
+def test_arrow_stream(client):
+    pa = pytest.importorskip("pyarrow")
+    response = client.post("/simulate/investment", json=PLANS, headers={"Accept": ARROW_MIME})
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.column("nominal").to_pylist()[1] == simulate(inputs_from_dict(PLANS[1])).nominal
@@ -0,0 +1,78 @@
+"""
+test_auth.py
+------------
+Registro e inicio de sesión: validación del cuerpo, hash bcrypt, migración de
+contraseñas en texto plano y rehash al cambiar el costo.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from backend import security
+
+
+def stored_password(app, email):
+    from backend.app import User
+
+    with app.app_context():
+        return User.query.filter_by(email=email).one().password
+
+
+def add_user(app, email, password):
+    from backend.app import User, db
+
+    with app.app_context():
+        db.session.add(User(email=email, password=password))
+        db.session.commit()
+
+
+@pytest.mark.parametrize("path", ["/auth/register", "/auth/login"])
+@pytest.mark.parametrize("body", [[], "texto", 3, None])
+def test_non_object_body_is_rejected(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_register_hashes_and_login(client, app):
+    assert client.post("/auth/register", json={"email": "a@x", "password": "pw1"}).status_code == 201
+    assert client.post("/auth/register", json={"email": "a@x", "password": "pw2"}).status_code == 400
+    assert client.post("/auth/register", json={"email": "b@x"}).status_code == 400
+    stored = stored_password(app, "a@x")
+    assert security.hash_rounds(stored) == app.config["BCRYPT_LOG_ROUNDS"]
+    assert client.post("/auth/login", json={"email": "a@x", "password": "pw1"}).get_json()["token"]
+    assert client.post("/auth/login", json={"email": "a@x", "password": "bad"}).status_code == 401
+    assert client.post("/auth/login", json={"email": "nobody@x", "password": "pw1"}).status_code == 401
+
+
+def test_plaintext_password_migrates_on_login(client, app):
+    add_user(app, "legacy@x", "plain-secret")
+    assert client.post("/auth/login", json={"email": "legacy@x", "password": "wrong"}).status_code == 401
+    assert stored_password(app, "legacy@x") == "plain-secret"
+
+    assert client.post("/auth/login", json={"email": "legacy@x", "password": "plain-secret"}).status_code == 200
+    migrated = stored_password(app, "legacy@x")
+    assert security.hash_rounds(migrated) == app.config["BCRYPT_LOG_ROUNDS"]
+    assert client.post("/auth/login", json={"email": "legacy@x", "password": "plain-secret"}).status_code == 200
+    assert stored_password(app, "legacy@x") == migrated
+
+
+def test_rehash_when_cost_changes(client, app):
+    client.post("/auth/register", json={"email": "c@x", "password": "pw"})
+    old_cost = app.config["BCRYPT_LOG_ROUNDS"]
+    app.config["BCRYPT_LOG_ROUNDS"] = old_cost + 1
+    try:
+        assert client.post("/auth/login", json={"email": "c@x", "password": "pw"}).status_code == 200
+        assert security.hash_rounds(stored_password(app, "c@x")) == old_cost + 1
+        with app.app_context():
+            assert security.verify_password(stored_password(app, "c@x"), "pw") == (True, False)
+    finally:
+        app.config["BCRYPT_LOG_ROUNDS"] = old_cost
+
+
+def test_long_passwords_are_prehashed(client):
+    long_password = "ñ" * 60  # 120 bytes: más de los 72 que admite bcrypt
+    assert client.post("/auth/register", json={"email": "long@x", "password": long_password}).status_code == 201
+    assert client.post("/auth/login", json={"email": "long@x", "password": long_password}).status_code == 200
+    assert client.post("/auth/login", json={"email": "long@x", "password": long_password[:-1]}).status_code == 401
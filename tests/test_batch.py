@@ -0,0 +1,103 @@
+"""
+test_batch.py
+-------------
+Los motores vectorizados deben reproducir a los escalares escenario por
+escenario: ``simulate_batch`` contra ``simulate`` y ``simulate_debt_batch``
+contra ``simulate_debt`` (tabla y resumen, forma cerrada y ciclo).
+"""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.core.calc import SUMMARY_FIELDS, DebtError, DebtInputs, simulate_debt, simulate_debt_batch  # noqa: E402
+from backend.core.invest_batch import YEAR_COLUMNS, simulate_batch, stack_inputs  # noqa: E402
+from backend.core.invest_calc import Inputs, simulate  # noqa: E402
+
+REL = 1e-9
+N = 400
+
+
+def random_inputs(rnd: random.Random) -> Inputs:
+    irregular = rnd.random() < 0.5
+    extra = dict(
+        custody_fixed=rnd.choice([0, 15]), platform_fixed=rnd.choice([0, 9]),
+        div_yield=rnd.choice([0, 2.5]), div_policy=rnd.choice(["reinvest", "withdraw"]),
+        extra_months=rnd.choice(["", "6,12", "1"]), extra_amount=rnd.choice([0, 5000]),
+        skip_months=rnd.choice(["", "7,8", "12"]),
+    ) if irregular else {}
+    return Inputs(
+        initial=rnd.choice([0, 1000, 25000.5]), monthly=rnd.choice([0, 200, 1500.25]),
+        years=rnd.randint(0, 40), annual_return=rnd.uniform(-5, 25), inflation=rnd.uniform(0, 12),
+        fee_deposit=rnd.choice([0, 0.5]), buy_sell=rnd.choice([0, 0.3]), mgmt=rnd.choice([0, 1.2]),
+        vat_on_fees=rnd.choice([0, 16]), tax_gain=rnd.choice([10, 20]), contrib_growth=rnd.choice([0, 3.5]),
+        market_spread=rnd.choice([0, 0.2]), instrument=rnd.choice(["mx_stock", "mx_debt", "usa_stock", "fund"]),
+        w8ben=rnd.random() < 0.5, frequency=rnd.choice(["monthly", "biweekly", "annual"]),
+        timing=rnd.choice(["begin", "end"]), sell_fee=rnd.choice([0, 0.25]), exit_spread=rnd.choice([0, 0.1]),
+        **extra,
+    )
+
+
+def random_debt(rnd: random.Random) -> DebtInputs:
+    return DebtInputs(
+        title="",
+        cost=rnd.uniform(1e3, 5e6) if rnd.random() > 0.05 else 0.0,
+        down_payment=rnd.uniform(0, 1e5) if rnd.random() < 0.5 else 0.0,
+        cat_annual=rnd.choice([0, -5, rnd.uniform(0, 80), rnd.uniform(0, 40)]),
+        open_pct=rnd.uniform(0, 3), insurance_monthly=rnd.uniform(0, 500), term_months=rnd.randint(0, 360),
+        extra_months=set(rnd.sample(range(1, 13), rnd.randint(0, 4))) if rnd.random() < 0.5 else set(),
+        extra_amount=rnd.choice([0, rnd.uniform(0, 1e5)]),
+        skip_months=set(rnd.sample(range(1, 13), rnd.randint(0, 3))) if rnd.random() < 0.3 else set(),
+        inflation_annual=rnd.uniform(-5, 10),
+    )
+
+
+def assert_close(got, want) -> None:
+    got, want = np.asarray(got, dtype=float), np.asarray(want, dtype=float)
+    assert got.shape == want.shape
+    assert np.all(np.abs(got - want) <= REL * np.maximum(1.0, np.abs(want)))
+
+
+def test_investment_batch_matches_scalar():
+    rnd = random.Random(2)
+    items = [random_inputs(rnd) for _ in range(N)]
+    out = simulate_batch(stack_inputs(items))
+    assert out.shape[2] == len(YEAR_COLUMNS)
+    for i, p in enumerate(items):
+        result = simulate(p)
+        want = np.column_stack([result.rows.column(name) for name in YEAR_COLUMNS]) if p.years else np.empty((0, 7))
+        assert_close(out[i, :p.years], want)
+        assert np.isnan(out[i, p.years:]).all()
+        if p.years:
+            assert_close(out[i, p.years - 1, 1], result.nominal)
+
+
+def test_investment_batch_broadcasts_scalars():
+    monthly = np.array([100.0, 200.0, 300.0])
+    out = simulate_batch({"monthly": monthly, "years": 10, "annual_return": 7.0})
+    for i, m in enumerate(monthly):
+        assert_close(out[i, -1, 1], simulate(Inputs(monthly=m, years=10, annual_return=7.0)).nominal)
+
+
+@pytest.mark.parametrize("closed_form", [True, False])
+def test_debt_batch_matches_scalar(closed_form):
+    rnd = random.Random(1)
+    items = [random_debt(rnd) for _ in range(N)]
+    full = simulate_debt_batch(items, rows=True, closed_form=closed_form)
+    summary_only = simulate_debt_batch(items, rows=False, closed_form=closed_form)
+    for i, data in enumerate(items):
+        try:
+            rows, summary = simulate_debt(data, closed_form=closed_form)
+        except DebtError:
+            assert not full["ok"][i] and not summary_only["ok"][i]
+            continue
+        assert full["ok"][i] and full["months"][i] == summary["months"] == summary_only["months"][i]
+        for name in SUMMARY_FIELDS[1:]:
+            assert_close(full[name][i], summary[name])
+            assert_close(summary_only[name][i], summary[name])
+        assert_close(full["schedule"][i, :len(rows)], rows)
+        assert np.isnan(full["schedule"][i, len(rows):]).all()
@@ -0,0 +1,105 @@
+"""
+test_cache.py
+-------------
+Caché LRU de simulaciones: contadores, normalización de llaves, desalojo y
+errores que no se guardan.
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+
+from backend.core import cache
+from backend.core.cache import SimulationCache, cached_simulate, cached_simulate_debt, freeze_debt, freeze_inputs
+from backend.core.calc import DebtError, DebtInputs
+from backend.core.invest_calc import Inputs, simulate
+
+PLAN = Inputs(initial=5_000, monthly=1_000, years=15, annual_return=9, mgmt=1, extra_months="6,12", extra_amount=2_000)
+DEBT = DebtInputs(title="auto", cost=300_000, down_payment=60_000, cat_annual=18, open_pct=2, insurance_monthly=300,
+                  term_months=48, extra_months={3, 9}, extra_amount=5_000)
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    for c in (cache.invest_cache, cache.projection_cache, cache.debt_cache, cache.mc_cache):
+        c.clear()
+    yield
+    for c in (cache.invest_cache, cache.projection_cache, cache.debt_cache, cache.mc_cache):
+        c.clear()
+
+
+def test_hits_and_misses():
+    c = SimulationCache(maxsize=4)
+    calls = []
+    for key in ("a", "b", "a", "a", "c", "b"):
+        assert c.get_or_compute(key, lambda key=key: calls.append(key) or key.upper()) == key.upper()
+    assert calls == ["a", "b", "c"]
+    assert c.stats() == {"hits": 3, "misses": 3, "size": 3, "maxsize": 4}
+
+
+def test_lru_eviction_keeps_recently_used():
+    c = SimulationCache(maxsize=2)
+    c.get_or_compute("a", lambda: 1)
+    c.get_or_compute("b", lambda: 2)
+    c.get_or_compute("a", lambda: 1)       # "a" pasa a ser la más reciente
+    c.get_or_compute("c", lambda: 3)       # desaloja "b"
+    assert len(c) == 2
+    assert c.get_or_compute("a", lambda: pytest.fail("a fue desalojada")) == 1
+    assert c.get_or_compute("b", lambda: "recalculada") == "recalculada"
+
+
+def test_errors_are_not_cached():
+    c = SimulationCache()
+
+    def boom():
+        raise ZeroDivisionError
+
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError):
+            c.get_or_compute("k", boom)
+    assert len(c) == 0 and c.misses == 2
+    assert c.get_or_compute("k", lambda: 5) == 5
+
+
+def test_key_normalization():
+    assert freeze_inputs(replace(PLAN, extra_months="12, 6")) == freeze_inputs(PLAN)
+    assert freeze_inputs(replace(PLAN, extra_months="6,12,13,x")) == freeze_inputs(PLAN)
+    assert freeze_inputs(replace(PLAN, initial=5_000.0, years=15)) == freeze_inputs(replace(PLAN, initial=5_000, years=15.0))
+    assert hash(freeze_inputs(replace(PLAN, initial=5_000.0))) == hash(freeze_inputs(replace(PLAN, initial=5_000)))
+    assert freeze_inputs(replace(PLAN, monthly=1_001)) != freeze_inputs(PLAN)
+    assert freeze_debt(replace(DEBT, title="otro", extra_months={9, 3})) == freeze_debt(DEBT)
+
+
+def test_cached_simulate_shares_equivalent_inputs():
+    first = cached_simulate(PLAN)
+    assert cached_simulate(replace(PLAN, extra_months="12,6", initial=5_000.0)) is first
+    assert cache.invest_cache.stats()["hits"] == 1
+    assert first.nominal == simulate(PLAN).nominal
+
+
+def test_monte_carlo_fields_do_not_rerun_the_projection():
+    first = cached_simulate(PLAN)
+    for vol, runs in ((10.0, 500), (25.0, 5_000)):
+        assert cached_simulate(replace(PLAN, vol_annual=vol, mc_runs=runs)) is first
+    assert cache.invest_cache.misses == 1
+    assert cache.projection_cache.misses == 1
+
+
+def test_failed_simulation_is_not_cached():
+    bad = replace(PLAN, inflation=-100.0)
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError):
+            cached_simulate(bad)
+    assert len(cache.invest_cache) == 0
+    assert len(cache.projection_cache) == 0
+
+
+def test_debt_errors_are_not_cached():
+    never = replace(DEBT, down_payment=DEBT.cost)
+    for _ in range(2):
+        with pytest.raises(DebtError):
+            cached_simulate_debt(never)
+    assert len(cache.debt_cache) == 0
+    assert cached_simulate_debt(DEBT) is cached_simulate_debt(replace(DEBT, title="otro"))
@@ -0,0 +1,69 @@
+"""
+test_debt_closed_form.py
+------------------------
+La anualidad en forma cerrada de ``simulate_debt`` debe coincidir con el
+ciclo mes a mes: mismo número de meses y comisiones, y montos al centavo.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import replace
+
+import pytest
+
+from backend.core.calc import DEBT_COLUMNS, DebtInputs, is_regular_debt, simulate_debt
+
+TOLERANCE = 0.01
+CASES = 300
+
+
+def random_regular_debt(rnd: random.Random, max_cat: float = 50.0) -> DebtInputs:
+    cost = rnd.choice([rnd.uniform(1_000, 10_000_000), rnd.uniform(900_000, 1_100_000), 25_000.0])
+    return DebtInputs(
+        title="",
+        cost=cost,
+        down_payment=rnd.choice([0.0, rnd.uniform(0, cost / 2)]),
+        cat_annual=rnd.choice([0.0, rnd.uniform(-5, max_cat), rnd.uniform(10, 40)]),
+        open_pct=rnd.choice([0.0, 2.0]),
+        insurance_monthly=rnd.choice([0.0, 350.5]),
+        term_months=rnd.randint(1, 480),
+        inflation_annual=rnd.uniform(0, 10),
+    )
+
+
+@pytest.mark.parametrize("seed", range(CASES))
+def test_closed_form_matches_loop(seed: int) -> None:
+    data = random_regular_debt(random.Random(seed))
+    assert is_regular_debt(data)
+
+    closed_rows, closed = simulate_debt(data, closed_form=True)
+    loop_rows, loop = simulate_debt(data, closed_form=False)
+
+    assert closed["months"] == loop["months"] == len(closed_rows) == len(loop_rows)
+    for name in closed:
+        assert closed[name] == pytest.approx(loop[name], abs=TOLERANCE), name
+    for column, (a, b) in enumerate(zip(zip(*closed_rows), zip(*loop_rows))):
+        assert list(a) == pytest.approx(list(b), abs=TOLERANCE), DEBT_COLUMNS[column]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_same_termination_at_high_rates(seed: int) -> None:
+    # Con CAT alto y plazos largos el ciclo acumula pesos de redondeo, pero
+    # ambos motores deben cerrar en el mismo mes con las mismas comisiones.
+    data = random_regular_debt(random.Random(seed), max_cat=80.0)
+    data = replace(data, cat_annual=random.Random(seed).uniform(50, 80), term_months=random.Random(seed).randint(360, 480))
+    _rows, closed = simulate_debt(data, rows=False, closed_form=True)
+    _rows, loop = simulate_debt(data, rows=False, closed_form=False)
+    assert closed["months"] == loop["months"] == data.term_months
+    assert closed["total_fees"] == pytest.approx(loop["total_fees"], abs=TOLERANCE)
+    assert closed["total_paid"] == pytest.approx(loop["total_paid"], rel=1e-6)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_tiny_extra_payment_never_lengthens_the_credit(seed: int) -> None:
+    # Una cantidad extra mínima cambia de motor (cerrado -> ciclo); el plazo
+    # no puede crecer, o min_extra_payment deja de ser monótono.
+    data = replace(random_regular_debt(random.Random(seed)), extra_months={6})
+    base = simulate_debt(data, rows=False)[1]["months"]
+    assert simulate_debt(replace(data, extra_amount=1e-6), rows=False)[1]["months"] <= base
@@ -0,0 +1,75 @@
+"""
+test_horizon_projection.py
+--------------------------
+``HorizonProjection.result(n)`` debe ser idéntico a ``simulate`` con
+``years=n`` al alargar, acortar y volver a alargar el horizonte, incluidos los
+costos de salida del último año.
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+
+from backend.core import cache
+from backend.core.invest_calc import ROW_FIELDS, HorizonProjection, Inputs, is_regular, simulate
+
+# Con comisión de compra-venta, comisión y spread de salida y market spread,
+# el último año de cada horizonte es distinto del mismo año en uno más largo.
+EXIT = dict(buy_sell=0.3, sell_fee=0.25, exit_spread=0.1, market_spread=0.2)
+PLANS = [
+    Inputs(initial=20_000, monthly=2_500, annual_return=9, mgmt=1.1, fee_deposit=0.5, contrib_growth=3, **EXIT),
+    Inputs(initial=5_000, monthly=800, annual_return=7, instrument="mx_debt", frequency="biweekly", timing="end", **EXIT),
+    Inputs(initial=0, monthly=1_200, annual_return=11, instrument="usa_stock", frequency="annual", w8ben=False, **EXIT),
+    Inputs(initial=15_000, monthly=1_000, annual_return=8, div_yield=2.5, custody_fixed=15, platform_fixed=9,
+           extra_months="6,12", extra_amount=3_000, skip_months="8", **EXIT),
+    Inputs(initial=1_000, monthly=500, annual_return=-3, inflation=6, tax_gain=20, **EXIT),
+]
+HORIZONS = [5, 12, 3, 12, 25, 1, 0, 18, 25, 40]
+
+
+def assert_same(got, want) -> None:
+    assert tuple(got[1:]) == tuple(want[1:])
+    assert len(got.rows) == len(want.rows)
+    for name in ROW_FIELDS:
+        assert list(got.rows.column(name)) == list(want.rows.column(name)), name
+
+
+@pytest.mark.parametrize("closed_form", [True, False])
+@pytest.mark.parametrize("plan", range(len(PLANS)))
+def test_result_matches_simulate_for_every_horizon(plan, closed_form):
+    p = PLANS[plan]
+    projection = HorizonProjection(p, closed_form=closed_form)
+    for years in HORIZONS:
+        want = simulate(replace(p, years=years), closed_form=closed_form)
+        assert_same(projection.result(years), want)
+        summary = projection.result(years, rows=False)
+        assert tuple(summary[1:]) == tuple(want[1:]) and len(summary.rows) == 0
+    assert projection.years_computed == max(HORIZONS)
+
+
+def test_exit_costs_only_touch_the_final_year():
+    p = PLANS[0]
+    projection = HorizonProjection(p)
+    long = projection.result(20)
+    short = projection.result(10)
+    assert short.rows.get(9, "final_balance") < long.rows.get(9, "final_balance")
+    assert short.rows.get(8, "final_balance") == long.rows.get(8, "final_balance")
+    # Acortar no modifica las filas ya calculadas del horizonte largo.
+    assert_same(projection.result(20), long)
+
+
+def test_projection_cache_resumes_across_horizons():
+    cache.projection_cache.clear()
+    cache.invest_cache.clear()
+    p = PLANS[3]
+    try:
+        for years in HORIZONS:
+            assert_same(cache.cached_simulate(replace(p, years=years)), simulate(replace(p, years=years)))
+        assert cache.projection_cache.misses == 1
+        assert cache.projection_for(p).years_computed == max(HORIZONS)
+        assert not is_regular(p)
+    finally:
+        cache.projection_cache.clear()
+        cache.invest_cache.clear()
@@ -0,0 +1,62 @@
+"""
+test_invest_closed_form.py
+--------------------------
+La forma cerrada de ``simulate`` debe coincidir con el motor por pasos, al
+centavo, en cualquier calendario regular (ver ``is_regular``).
+"""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from backend.core.invest_calc import ROW_FIELDS, Inputs, is_regular, simulate
+
+TOLERANCE = 0.01
+CASES = 300
+
+
+def random_regular_inputs(rnd: random.Random) -> Inputs:
+    return Inputs(
+        initial=rnd.choice([0.0, 1000.0, 25000.5, rnd.uniform(0, 2_000_000)]),
+        monthly=rnd.choice([0.0, 200.0, 1500.25, rnd.uniform(0, 50_000)]),
+        years=rnd.randint(1, 50),
+        annual_return=rnd.uniform(-20, 30),
+        inflation=rnd.uniform(-2, 15),
+        fee_deposit=rnd.choice([0.0, 0.5, rnd.uniform(0, 3)]),
+        buy_sell=rnd.choice([0.0, 0.3]),
+        mgmt=rnd.choice([0.0, 1.2, rnd.uniform(0, 5)]),
+        vat_on_fees=rnd.choice([0.0, 16.0]),
+        tax_gain=rnd.choice([0.0, 10.0, 20.0, rnd.uniform(0, 35)]),
+        contrib_growth=rnd.choice([0.0, 3.5, rnd.uniform(-10, 15)]),
+        market_spread=rnd.choice([0.0, 0.2]),
+        instrument=rnd.choice(["mx_stock", "mx_debt", "usa_stock", "fund"]),
+        country=rnd.choice(["mx", "usa"]),
+        w8ben=rnd.random() < 0.5,
+        frequency=rnd.choice(["monthly", "biweekly", "annual"]),
+        timing=rnd.choice(["begin", "end"]),
+        # meses extra con monto cero siguen siendo un calendario regular
+        extra_months=rnd.choice(["", "6,12"]),
+        buy_fee=rnd.choice([0.0, 0.25]),
+        sell_fee=rnd.choice([0.0, 0.25]),
+        entry_spread=rnd.choice([0.0, 0.1]),
+        exit_spread=rnd.choice([0.0, 0.1]),
+    )
+
+
+@pytest.mark.parametrize("seed", range(CASES))
+def test_closed_form_matches_stepper(seed: int) -> None:
+    p = random_regular_inputs(random.Random(seed))
+    assert is_regular(p)
+
+    closed = simulate(p, closed_form=True)
+    stepped = simulate(p, closed_form=False)
+
+    assert closed.nominal == pytest.approx(stepped.nominal, abs=TOLERANCE)
+    assert closed.real_total == pytest.approx(stepped.real_total, abs=TOLERANCE)
+    assert closed.total_contrib == pytest.approx(stepped.total_contrib, abs=TOLERANCE)
+    assert closed.total_gain == pytest.approx(stepped.total_gain, abs=TOLERANCE)
+    assert len(closed.rows) == len(stepped.rows) == p.years
+    for name in ROW_FIELDS:
+        assert list(closed.rows.column(name)) == pytest.approx(list(stepped.rows.column(name)), abs=TOLERANCE), name
@@ -0,0 +1,90 @@
+"""
+test_montecarlo.py
+------------------
+Monte Carlo: con la misma semilla el resultado es idéntico bit a bit sin
+importar el número de workers, y la cancelación no espera a los bloques en
+cola.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.core import montecarlo  # noqa: E402
+from backend.core.invest_calc import Inputs  # noqa: E402
+
+PLAN = Inputs(initial=10_000, monthly=1_500, years=20, annual_return=8, vol_annual=15, mgmt=1, fee_deposit=0.5)
+RUNS = 5_000
+
+
+@pytest.fixture()
+def small_chunks(monkeypatch):
+    # ~40 trayectorias por bloque: muchos bloques con pocas corridas.
+    monkeypatch.setattr(montecarlo, "CHUNK_CELLS", 40 * 20 * 12)
+    assert montecarlo.chunk_paths(PLAN) == 40
+
+
+@pytest.mark.parametrize("frictions", [True, False])
+def test_worker_count_does_not_change_the_result(small_chunks, frictions):
+    one = montecarlo.simulate_mc(PLAN, runs=RUNS, seed=7, frictions=frictions, workers=1)
+    pooled = montecarlo.simulate_mc(PLAN, runs=RUNS, seed=7, frictions=frictions, workers=3)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        shared = montecarlo.simulate_mc(PLAN, runs=RUNS, seed=7, frictions=frictions, executor=executor)
+    for other in (pooled, shared):
+        assert np.array_equal(one.quantiles, other.quantiles)
+        assert (one.p5, one.p50, one.p95, one.runs) == (other.p5, other.p50, other.p95, other.runs)
+
+
+def test_seed_reproduces_and_differs(small_chunks):
+    a = montecarlo.simulate_mc(PLAN, runs=RUNS, seed=1)
+    b = montecarlo.simulate_mc(PLAN, runs=RUNS, seed=1)
+    c = montecarlo.simulate_mc(PLAN, runs=RUNS, seed=2)
+    assert np.array_equal(a.quantiles, b.quantiles)
+    assert not np.array_equal(a.quantiles, c.quantiles)
+
+
+class _CancelOnFirstChunk:
+    """Estimator that sets ``cancel`` as soon as it receives a shard."""
+
+    def __init__(self, cancel: threading.Event) -> None:
+        self.cancel = cancel
+        self.added = 0
+
+    def add(self, values) -> None:
+        self.added += 1
+        self.cancel.set()
+
+    def quantile(self, pct: float) -> float:  # pragma: no cover - nunca llega
+        raise AssertionError("la corrida debía cancelarse")
+
+
+def test_cancel_drops_queued_chunks(small_chunks, monkeypatch):
+    started = []
+    real_task = montecarlo._chunk_task
+
+    def counting_task(task):
+        started.append(task)
+        return real_task(task)
+
+    monkeypatch.setattr(montecarlo, "_chunk_task", counting_task)
+    cancel = threading.Event()
+    estimator = _CancelOnFirstChunk(cancel)
+    n_chunks = -(-RUNS // montecarlo.chunk_paths(PLAN))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(CancelledError):
+            montecarlo.simulate_mc(PLAN, runs=RUNS, seed=3, executor=executor, estimator=estimator, cancel=cancel)
+    assert estimator.added == 1
+    # Solo corren los bloques que ya estaban en marcha al cancelar.
+    assert len(started) <= 3 < n_chunks
+
+
+def test_cancel_before_start_with_process_pool(small_chunks):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(CancelledError):
+        montecarlo.simulate_mc(PLAN, runs=RUNS, seed=3, workers=2, cancel=cancel)
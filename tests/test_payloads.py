@@ -0,0 +1,80 @@
+"""
+test_payloads.py
+----------------
+Validación de escenarios de la API: tipos, opciones, rangos y resultados no
+finitos.
+"""
+
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from backend.core.invest_calc import Result, YearTable
+from backend.core.payloads import (
+    MAX_AMOUNT,
+    MAX_YEARS,
+    PayloadError,
+    check_result,
+    debt_from_dict,
+    inputs_from_dict,
+    parse_each,
+)
+
+DEBT = {"cost": 100000, "down_payment": 10000, "cat_annual": 20, "open_pct": 1, "insurance_monthly": 50, "term_months": 24}
+
+
+@pytest.mark.parametrize("field, value", [
+    ("inflation", 1e300),
+    ("annual_return", 1e200),
+    ("annual_return", -100),
+    ("contrib_growth", -150),
+    ("initial", 1e308),
+    ("monthly", -2 * MAX_AMOUNT),
+    ("years", MAX_YEARS + 1),
+    ("frequency", "weekly"),
+    ("timing", "middle"),
+    ("instrument", "crypto"),
+    ("div_policy", "cash"),
+    ("country", "ca"),
+    ("years", 2.5),
+    ("monthly", "100"),
+    ("initial", math.inf),
+])
+def test_invalid_investment_fields_are_rejected(field, value):
+    with pytest.raises(PayloadError):
+        inputs_from_dict({"monthly": 100, field: value})
+
+
+@pytest.mark.parametrize("field, value", [
+    ("cat_annual", 1e300),
+    ("cat_annual", -100),
+    ("cost", 1e308),
+    ("term_months", 1201),
+])
+def test_invalid_debt_fields_are_rejected(field, value):
+    with pytest.raises(PayloadError):
+        debt_from_dict({**DEBT, field: value})
+
+
+def test_valid_edges_are_accepted():
+    p = inputs_from_dict({"years": MAX_YEARS, "annual_return": 1000, "frequency": "biweekly", "extra_months": [6, 12]})
+    assert p.years == MAX_YEARS and p.extra_months == "6,12"
+    assert debt_from_dict({**DEBT, "term_months": 1200, "extra_months": "6"}).extra_months == {6}
+
+
+def test_errors_carry_the_scenario_index():
+    with pytest.raises(PayloadError) as info:
+        parse_each([{}, {"timing": "x"}], inputs_from_dict)
+    assert info.value.index == 1
+    assert info.value.to_dict()["index"] == 1
+
+
+def test_non_finite_results_are_rejected():
+    ok = Result(YearTable(), 1.0, 1.0, 0.0, 1.0)
+    assert check_result(ok) is ok
+    with pytest.raises(PayloadError):
+        check_result(Result(YearTable(), math.inf, 1.0, 0.0, 1.0))
+    with pytest.raises(PayloadError):
+        check_result(([], {"months": 1, "total_paid": math.nan}))
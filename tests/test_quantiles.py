@@ -0,0 +1,79 @@
+"""
+test_quantiles.py
+-----------------
+El sketch logarítmico queda dentro de ``alpha`` (relativo) del cuantil exacto
+con la misma convención de rango, también al combinar shards.
+"""
+
+from __future__ import annotations
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.core.quantiles import ExactQuantiles, LogHistogramSketch, make_estimator, nearest_rank  # noqa: E402
+
+PCTS = [q / 100.0 for q in range(101)] + [0.001, 0.999]
+
+
+def _samples(seed: int):
+    rng = np.random.default_rng(seed)
+    return [
+        rng.lognormal(12.0, 1.5, 20_000),
+        rng.normal(0.0, 1e5, 20_000),                      # negativos y cercanos a cero
+        np.concatenate([np.zeros(500), rng.uniform(1e-3, 1e12, 5_000)]),
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("alpha", [0.005, 0.02])
+def test_sketch_within_alpha_of_exact(seed, alpha):
+    for values in _samples(seed):
+        exact = ExactQuantiles()
+        sketch = LogHistogramSketch(alpha=alpha)
+        for shard in np.array_split(values, 7):
+            exact.add(shard)
+            sketch.add(shard)
+        assert sketch.count == exact.count == len(values)
+        for q in PCTS:
+            x = exact.quantile(q)
+            v = sketch.quantile(q)
+            assert abs(v - x) <= alpha * abs(x) + sketch.min_value, (q, x, v)
+
+
+def test_merge_equals_single_sketch():
+    values = _samples(0)[0]
+    whole = LogHistogramSketch()
+    whole.add(values)
+    merged = LogHistogramSketch()
+    for shard in np.array_split(values, 4):
+        part = LogHistogramSketch()
+        part.add(shard)
+        merged.merge(part)
+    assert [merged.quantile(q) for q in PCTS] == [whole.quantile(q) for q in PCTS]
+
+
+def test_exact_uses_nearest_rank():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+    exact = ExactQuantiles()
+    exact.add(values)
+    for q in PCTS:
+        assert exact.quantile(q) == nearest_rank(sorted(values), q)
+
+
+@pytest.mark.parametrize("bad", [math.inf, -math.inf, math.nan])
+def test_sketch_rejects_non_finite_values(bad):
+    sketch = LogHistogramSketch()
+    sketch.add([1.0, 2.0])
+    with pytest.raises(ValueError, match="finitos"):
+        sketch.add([3.0, bad])
+    assert sketch.count == 2
+
+
+def test_make_estimator_kinds():
+    assert isinstance(make_estimator("auto", 10), ExactQuantiles)
+    assert isinstance(make_estimator("auto", 10**9), LogHistogramSketch)
+    with pytest.raises(ValueError):
+        make_estimator("median")
@@ -0,0 +1,125 @@
+"""
+test_recalc.py
+--------------
+Grafo de recálculo y planificador con un intérprete Tcl sin ventana: un
+evento de UI que escribe varias variables produce un solo recálculo.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+tk = pytest.importorskip("tkinter")
+
+from frontend.recalc import RecalcGraph, RecalcScheduler  # noqa: E402
+
+
+@pytest.fixture()
+def tcl():
+    try:
+        interp = tk.Tcl()
+    except tk.TclError as exc:  # pragma: no cover - Tcl no disponible
+        pytest.skip(str(exc))
+    yield interp
+    interp.quit()
+
+
+def run_until(interp, done, timeout=5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        interp.update()
+        time.sleep(0.002)
+
+
+def test_one_event_one_notification(tcl):
+    graph = RecalcGraph(tcl)
+    calls = []
+    amount = tk.DoubleVar(master=tcl, value=0.0)
+    years = tk.IntVar(master=tcl, value=1)
+    rate = tk.DoubleVar(master=tcl, value=5.0)
+    recalc = lambda: calls.append(1)  # noqa: E731
+    for var in (amount, years, rate, amount):  # registro doble, como _labeled_scale
+        graph.bind(var, recalc)
+    # El ajuste al paso de un slider vuelve a escribir dentro de la traza.
+    amount.trace_add("write", lambda *_: amount.get() != 100.0 and amount.set(100.0))
+
+    amount.set(97.5)
+    years.set(10)
+    rate.set(7.0)
+    tcl.update()
+
+    assert graph.events >= 3
+    assert calls == [1]
+    assert graph.flushes == 1
+    assert graph.last_flush_notifications == 1
+
+
+def test_each_subscriber_runs_once_per_event(tcl):
+    graph = RecalcGraph(tcl)
+    seen = []
+    plan = lambda: seen.append("plan")  # noqa: E731
+    chart = lambda: seen.append("chart")  # noqa: E731
+    a = tk.StringVar(master=tcl)
+    b = tk.StringVar(master=tcl)
+    graph.bind(a, plan)
+    graph.bind(b, plan)
+    graph.bind(b, chart)
+    a.set("1")
+    b.set("2")
+    b.set("3")
+    tcl.update()
+    assert sorted(seen) == ["chart", "plan"]
+    assert graph.last_flush_notifications == 2
+    a.set("4")
+    tcl.update()
+    assert seen[2:] == ["plan"]
+    assert graph.flushes == 2
+    assert graph.last_flush_notifications == 1
+
+
+def test_event_burst_runs_one_simulation(tcl):
+    graph = RecalcGraph(tcl)
+    values = [tk.DoubleVar(master=tcl) for _ in range(5)]
+    applied = []
+    scheduler = RecalcScheduler(
+        tcl,
+        collect=lambda: [v.get() for v in values],
+        compute=lambda job, cancel: sum(job),
+        apply=applied.append,
+        delay_ms=20,
+        poll_ms=1,
+    )
+    for var in values:
+        graph.bind(var, scheduler.request)
+    try:
+        for i, var in enumerate(values):
+            var.set(i + 1.0)
+        run_until(tcl, lambda: applied)
+        assert applied == [15.0]
+        assert graph.last_flush_notifications == 1
+        assert scheduler.requests == 1
+        assert scheduler.runs == 1
+    finally:
+        scheduler.shutdown()
+
+
+def test_request_invalidates_the_running_job(tcl):
+    started = []
+    scheduler = RecalcScheduler(
+        tcl,
+        collect=lambda: len(started),
+        compute=lambda job, cancel: started.append(job) or (cancel.wait(2.0), job)[1],
+        apply=lambda result: None,
+        delay_ms=1,
+        poll_ms=1,
+    )
+    try:
+        scheduler.request()
+        run_until(tcl, lambda: started)
+        running = scheduler._cancel
+        scheduler.request()
+        assert running.is_set()
+    finally:
+        scheduler.shutdown()